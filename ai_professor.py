@@ -2,11 +2,16 @@ import streamlit as st
 from langchain.schema import AIMessage, HumanMessage
 from langchain.chat_models import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.vectorstores import FAISS
 from langchain.embeddings import OpenAIEmbeddings
-from PyPDF2 import PdfReader
-import hashlib
+import pdf_pipeline
+import index_cache
+import page_index
+import course_library
+import indexing_worker
+import compressed_index
+import llm_clients
+import chat_memory
+import response_cache
 from streamlit_pdf_viewer import pdf_viewer
 import tempfile
 import os
@@ -14,69 +19,107 @@ import os
 # API Keys
 google_api_key = st.secrets["google_api_key"]
 openai_api_key = st.secrets["openai_api_key"]
+# Optional OpenAI-compatible embeddings endpoint, e.g. stub_embedding_server.py for benchmarks
+embedding_base_url = st.secrets.get("embedding_base_url")
 
-st.set_page_config(page_title="AI Professor", page_icon="👨‍🏫")
-st.title("👨‍🏫 AI Professor")
+# Chunking parameters, applied within each page; also part of the index cache key
+CHUNK_SIZE = 10000
+CHUNK_OVERLAP = 1000
+# Course index type ("flat", "ivf" or "ivfpq") and inverted lists probed per query
+INDEX_TYPE = st.secrets.get("index_type", "flat")
+INDEX_NPROBE = st.secrets.get("index_nprobe", compressed_index.IVF_NPROBE)
+# Keep-alive connections and request timeout of the shared model clients
+LLM_POOL_SIZE = st.secrets.get("llm_pool_size", llm_clients.HTTP_POOL_SIZE)
+LLM_TIMEOUT_SECONDS = st.secrets.get("llm_timeout_seconds", llm_clients.HTTP_TIMEOUT_SECONDS)
+# Prompt tokens allowed for the chat history (running summary plus recent turns)
+HISTORY_TOKEN_BUDGET = st.secrets.get("history_token_budget", chat_memory.HISTORY_TOKEN_BUDGET)
+# Reuse the cached response of a question at least this similar (None = exact matches only)
+RESPONSE_SIMILARITY = st.secrets.get("response_cache_similarity", response_cache.SIMILARITY_THRESHOLD)
 
-# Helper Functions
-def get_pdf_text(pdf_docs):
-    """Extract text from PDF documents."""
-    text = ""
-    if isinstance(pdf_docs, list):
-        for pdf in pdf_docs:
-            pdf_reader = PdfReader(pdf)
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-    else:
-        pdf_reader = PdfReader(pdf_docs)
-        for page in pdf_reader.pages:
-            text += page.extract_text()
-    return text
-
-def get_text_chunks(text):
-    """Split text into manageable chunks."""
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=10000, chunk_overlap=1000)
-    chunks = text_splitter.split_text(text)
-    return chunks
-
-def get_vector_store(text_chunks):
-    """Create a FAISS vector store from text chunks."""
-    embeddings = OpenAIEmbeddings(openai_api_key=openai_api_key)
-    vector_store = FAISS.from_texts(text_chunks, embedding=embeddings)
-    return vector_store
-
-def get_response(user_query, chat_history, vector_store):
-    """Generate a response using LangChain."""
-    template = """
+PROMPT = ChatPromptTemplate.from_template("""
     You are a helpful assistant. Use the provided context and chat history to answer the user's question.
 
     Context: {context}
     Chat history: {chat_history}
     User question: {user_question}
-    """
-    prompt = ChatPromptTemplate.from_template(template)
-    llm = ChatOpenAI(openai_api_key=openai_api_key, model="gpt-4", temperature=0.7)
+    """)
+
+st.set_page_config(page_title="AI Professor", page_icon="👨‍🏫")
+st.title("👨‍🏫 AI Professor")
+
+# Helper Functions
+def get_llm():
+    """Return the chat model client shared by every session of this process."""
+    return llm_clients.get_client(
+        ChatOpenAI, LLM_POOL_SIZE, LLM_TIMEOUT_SECONDS, openai_api_key=openai_api_key, model="gpt-4", temperature=0.7
+    )
+
+def get_embeddings():
+    """Return the embeddings client shared by every session of this process."""
+    return llm_clients.get_client(
+        OpenAIEmbeddings, LLM_POOL_SIZE, LLM_TIMEOUT_SECONDS,
+        openai_api_key=openai_api_key, openai_api_base=embedding_base_url,
+    )
+
+def get_vector_store(pdf_docs, pdf_hash, previous_vector_store=None, on_batch=None, lock=None):
+    """Load the PDF's FAISS vector store from the index cache, or update the previous
+    document's store page by page, re-embedding only the pages that changed."""
+    embeddings = get_embeddings()
+    return index_cache.get_or_build_index(
+        pdf_hash, embeddings, CHUNK_SIZE, CHUNK_OVERLAP,
+        lambda: page_index.update_vector_store(
+            previous_vector_store, pdf_docs, embeddings, CHUNK_SIZE, CHUNK_OVERLAP, on_batch, lock
+        ),
+    )
+
+def get_prompt(user_query, chat_history, vector_store):
+    """Fill the prompt with the chunks most relevant to the question."""
     docs = vector_store.similarity_search(user_query, k=5)
     context = "\n".join([doc.page_content for doc in docs])
+    history = chat_memory.format_history(st.session_state.chat_memory, chat_history, HISTORY_TOKEN_BUDGET)
+    return PROMPT.format(context=context, chat_history=history, user_question=user_query)
+
+def stream_response(user_query, chat_history, vector_store):
+    """Yield the response text chunk by chunk as the model generates it."""
+    for chunk in get_llm().stream(get_prompt(user_query, chat_history, vector_store)):
+        yield chunk.content
 
-    response = llm.predict(prompt.format(context=context, chat_history=chat_history, user_question=user_query))
+def answer_with_cache(user_query, chat_history, vector_store, document_key, bypass_cache=False):
+    """Show a cached response for the question, or stream a fresh one and cache it."""
+    response, question_vector = None, None
+    if document_key is not None and not bypass_cache:
+        response, question_vector = response_cache.lookup(
+            document_key, user_query, get_embeddings(), RESPONSE_SIMILARITY
+        )
+    if response is not None:
+        st.write(response)
+        return response
+    response = st.write_stream(stream_response(user_query, chat_history, vector_store))
+    if document_key is not None:
+        response_cache.store(document_key, user_query, response, question_vector)
     return response
 
 def get_pdf_hash(pdf_docs):
-    """Generate a hash for the uploaded PDFs."""
-    combined_hash = hashlib.md5()
-    content = pdf_docs.read()
-    combined_hash.update(content)
-    pdf_docs.seek(0)  # Reset the stream position
-    return combined_hash.hexdigest()
+    """Generate a hash for the uploaded PDFs, reusing it across reruns of the same upload."""
+    return pdf_pipeline.hash_pdfs(pdf_docs)
 
 # Session State Initialization
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = [AIMessage(content="Hello! I am your AI assistant. How can I help you?")]
+if "chat_memory" not in st.session_state:
+    st.session_state.chat_memory = chat_memory.new_memory()
 if "vector_store" not in st.session_state:
     st.session_state.vector_store = None
 if "current_pdf_hash" not in st.session_state:
     st.session_state.current_pdf_hash = None
+if "library" not in st.session_state:
+    st.session_state.library = course_library.new_library()
+if "indexing_job" not in st.session_state:
+    st.session_state.indexing_job = None
+    st.session_state.indexing_pdf_hash = None
+if "failed_pdf_hash" not in st.session_state:
+    st.session_state.failed_pdf_hash = None
+    st.session_state.indexing_error = None
 
 # Display Chat History
 for message in st.session_state.chat_history:
@@ -90,24 +133,78 @@ for message in st.session_state.chat_history:
 # Sidebar for PDF Upload
 with st.sidebar:
     st.title("Menu:")
-    uploaded_pdf = st.file_uploader("Upload PDF Course Material", type=["pdf"])
-    if uploaded_pdf:
+    uploaded_pdfs = st.file_uploader("Upload PDF Course Material", type=["pdf"], accept_multiple_files=True)
+    if uploaded_pdfs:
         view_pdf = st.checkbox("View PDF")
         if view_pdf:
+            pdf_to_view = st.selectbox("Document", uploaded_pdfs, format_func=lambda pdf: pdf.name)
             with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
-                temp_file.write(uploaded_pdf.read())
+                temp_file.write(pdf_to_view.getvalue())
                 temp_pdf_path = temp_file.name
             pdf_viewer(temp_pdf_path, width=800)
 
-# Process PDF and Generate Vector Store
-if uploaded_pdf:
-    new_hash = get_pdf_hash(uploaded_pdf)
-    if new_hash != st.session_state.current_pdf_hash:
-        pdf_text = get_pdf_text(uploaded_pdf)
-        text_chunks = get_text_chunks(pdf_text)
-        st.session_state.vector_store = get_vector_store(text_chunks)
-        st.session_state.current_pdf_hash = new_hash
-        st.success("PDF processed successfully!")
+# Process PDFs in the background: one sub-index per document, merged into the course library index
+new_hash = get_pdf_hash(uploaded_pdfs) if uploaded_pdfs else None
+# A running job for files that are no longer the upload is dropped, even when
+# the upload went back to the library already in use
+if st.session_state.indexing_job is not None and new_hash != st.session_state.indexing_pdf_hash:
+    indexing_worker.cancel_indexing(st.session_state.indexing_job)
+    st.session_state.indexing_job = None
+    st.session_state.indexing_pdf_hash = None
+# current_pdf_hash always describes the library in use; it only moves once a job succeeds.
+# An upload whose indexing failed is only indexed again through the retry button.
+if uploaded_pdfs and new_hash not in (
+    st.session_state.current_pdf_hash, st.session_state.indexing_pdf_hash, st.session_state.failed_pdf_hash
+):
+    st.session_state.indexing_job = indexing_worker.start_indexing(
+        st.session_state.library, uploaded_pdfs, get_vector_store, INDEX_TYPE
+    )
+    st.session_state.indexing_pdf_hash = new_hash
+
+indexing_job = st.session_state.indexing_job
+if indexing_job is not None and indexing_job["status"] != "running":
+    st.session_state.indexing_job = None
+    if indexing_job["status"] == "done":
+        st.session_state.library = indexing_job["result"]
+        st.session_state.current_pdf_hash = st.session_state.indexing_pdf_hash
+        compressed_index.set_nprobe(st.session_state.library["merged"], INDEX_NPROBE)
+        st.success("PDFs processed successfully!")
+    elif indexing_job["status"] == "failed":
+        st.session_state.failed_pdf_hash = st.session_state.indexing_pdf_hash
+        st.session_state.indexing_error = indexing_job["error"]
+    st.session_state.indexing_pdf_hash = None
+
+if uploaded_pdfs and new_hash == st.session_state.failed_pdf_hash:
+    st.error(f"Indexing failed: {st.session_state.indexing_error}")
+    if st.button("Retry indexing"):
+        st.session_state.failed_pdf_hash = None
+        st.rerun()
+
+@st.fragment(run_every=1)
+def show_indexing_progress():
+    """Refresh the progress bar every second, and rerun the app once indexing ends."""
+    indexing_job = st.session_state.indexing_job
+    if indexing_job is None or indexing_job["status"] != "running":
+        st.rerun()
+    fraction, text = indexing_worker.indexing_progress(indexing_job)
+    st.progress(fraction, text=text)
+
+# Responses are cached per library and search scope, but not while answers come from a partial index
+document_key = None
+if st.session_state.indexing_job is not None:
+    # Answer from the chunks indexed so far while the rest is processed
+    with st.sidebar:
+        show_indexing_progress()
+    st.session_state.vector_store = indexing_worker.PartialIndex(st.session_state.indexing_job)
+elif uploaded_pdfs:
+    with st.sidebar:
+        search_scope = st.selectbox("Search in", course_library.document_names(st.session_state.library))
+    st.session_state.vector_store = course_library.get_search_index(st.session_state.library, search_scope)
+    document_key = (st.session_state.current_pdf_hash, search_scope)
+
+with st.sidebar:
+    bypass_cache = st.checkbox("Fresh answer (skip cache)")
+    st.caption(response_cache.stats_text())
 
 # Chat Input
 user_query = st.chat_input("Ask your question here...")
@@ -118,9 +215,14 @@ if user_query:
 
     if st.session_state.vector_store:
         with st.chat_message("AI"):
-            with st.spinner("Thinking..."):
-                response = get_response(user_query, st.session_state.chat_history, st.session_state.vector_store)
-                st.write(response)
-                st.session_state.chat_history.append(AIMessage(content=response))
+            response = answer_with_cache(
+                user_query, st.session_state.chat_history, st.session_state.vector_store, document_key, bypass_cache
+            )
+            st.session_state.chat_history.append(AIMessage(content=response))
     else:
         st.error("Please upload a PDF first!")
+
+# Fold turns that left the recent window into the running summary
+st.session_state.chat_memory = chat_memory.update_memory(
+    st.session_state.chat_memory, st.session_state.chat_history, get_llm().predict
+)
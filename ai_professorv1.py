@@ -1,11 +1,11 @@
 import streamlit as st
 from langchain.chat_models import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.vectorstores import FAISS
 from langchain.embeddings import OpenAIEmbeddings
-from PyPDF2 import PdfReader
-import hashlib
+import pdf_pipeline
+import index_cache
+import page_index
+import llm_clients
 from streamlit_pdf_viewer import pdf_viewer
 import tempfile
 import os
@@ -13,61 +13,48 @@ import os
 # API Keys
 google_api_key = st.secrets.get("google_api_key", "")
 openai_api_key = st.secrets.get("openai_api_key", "")
+# Optional OpenAI-compatible embeddings endpoint, e.g. stub_embedding_server.py for benchmarks
+embedding_base_url = st.secrets.get("embedding_base_url")
+
+# Chunking parameters, applied within each page; also part of the index cache key
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
 
 # Streamlit Page Configuration
 st.set_page_config(page_title="AI Professor", page_icon="👨‍🏫")
 st.title("👨‍🏫 AI Professor")
 
-# Helper Functions
-def get_pdf_text(pdf_docs):
-    """Extract text from PDF documents."""
-    text = ""
-    if isinstance(pdf_docs, list):
-        for pdf in pdf_docs:
-            pdf_reader = PdfReader(pdf)
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-    else:
-        pdf_reader = PdfReader(pdf_docs)
-        for page in pdf_reader.pages:
-            text += page.extract_text()
-    return text
+PROMPT = ChatPromptTemplate.from_template("""
+    You are a helpful assistant. Use the context from the provided document to answer the user's question.
 
-def get_text_chunks(text):
-    """Split text into manageable chunks."""
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-    chunks = text_splitter.split_text(text)
-    return chunks
+    Context: {context}
+    User Question: {user_question}
+    """)
 
-def get_vector_store(text_chunks):
-    """Create a FAISS vector store from text chunks."""
-    embeddings = OpenAIEmbeddings(openai_api_key=openai_api_key)
-    vector_store = FAISS.from_texts(text_chunks, embedding=embeddings)
-    return vector_store
+# Helper Functions
+def get_vector_store(pdf_docs, pdf_hash, previous_vector_store=None):
+    """Load the PDF's FAISS vector store from the index cache, or update the previous
+    document's store page by page, re-embedding only the pages that changed."""
+    embeddings = llm_clients.get_client(
+        OpenAIEmbeddings, openai_api_key=openai_api_key, openai_api_base=embedding_base_url
+    )
+    return index_cache.get_or_build_index(
+        pdf_hash, embeddings, CHUNK_SIZE, CHUNK_OVERLAP,
+        lambda: page_index.update_vector_store(previous_vector_store, pdf_docs, embeddings, CHUNK_SIZE, CHUNK_OVERLAP),
+    )
 
 def get_response(user_query, vector_store):
     """Generate a response using LangChain."""
-    template = """
-    You are a helpful assistant. Use the context from the provided document to answer the user's question.
-
-    Context: {context}
-    User Question: {user_question}
-    """
-    prompt = ChatPromptTemplate.from_template(template)
-    llm = ChatOpenAI(openai_api_key=openai_api_key, model="gpt-4", temperature=0.7)
+    llm = llm_clients.get_client(ChatOpenAI, openai_api_key=openai_api_key, model="gpt-4", temperature=0.7)
     docs = vector_store.similarity_search(user_query, k=5)
     context = "\n".join([doc.page_content for doc in docs])
 
-    response = llm.predict(prompt.format(context=context, user_question=user_query))
+    response = llm.predict(PROMPT.format(context=context, user_question=user_query))
     return response
 
 def get_pdf_hash(pdf_docs):
-    """Generate a hash for the uploaded PDFs."""
-    combined_hash = hashlib.md5()
-    content = pdf_docs.read()
-    combined_hash.update(content)
-    pdf_docs.seek(0)  # Reset the stream position
-    return combined_hash.hexdigest()
+    """Generate a hash for the uploaded PDFs, reusing it across reruns of the same upload."""
+    return pdf_pipeline.hash_pdfs(pdf_docs)
 
 # Session State Initialization
 if "vector_store" not in st.session_state:
@@ -91,9 +78,7 @@ with st.sidebar:
 if uploaded_pdf:
     new_hash = get_pdf_hash(uploaded_pdf)
     if new_hash != st.session_state.current_pdf_hash:
-        pdf_text = get_pdf_text(uploaded_pdf)
-        text_chunks = get_text_chunks(pdf_text)
-        st.session_state.vector_store = get_vector_store(text_chunks)
+        st.session_state.vector_store = get_vector_store(uploaded_pdf, new_hash, st.session_state.vector_store)
         st.session_state.current_pdf_hash = new_hash
         st.success("PDF processed successfully! You can now ask questions.")
 
@@ -1,14 +1,17 @@
 import streamlit as st
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 from datetime import datetime
 import json
 import os
+import course_index
+import answer_cache
 
 # File paths for storing persistent data
 COURSE_CONTENT_FILE = "course_content.json"
 CHAT_HISTORY_FILE = "chat_history.json"
 
+# Course selection option that searches every course at once
+ALL_COURSES = "All Courses"
+
 # Configure Streamlit app
 st.set_page_config(
     page_title="AI Teaching Assistant",
@@ -28,24 +31,61 @@ def save_json(data, file_path):
     """Save JSON data to a file."""
     with open(file_path, "w") as file:
         json.dump(data, file, indent=4)
+    if file_path == COURSE_CONTENT_FILE:
+        answer_cache.invalidate_changed_courses(data)
 
 def parse_uploaded_content(file_content):
     """Parse uploaded content into a list of topics."""
     content = file_content.decode("utf-8")
     return [line.strip() for line in content.splitlines() if line.strip()]
 
-def find_most_relevant_answer(question, course_content):
-    """Find the most relevant answer using TF-IDF and cosine similarity."""
-    vectorizer = TfidfVectorizer()
-    tfidf_matrix = vectorizer.fit_transform([question] + course_content)
-    cosine_similarities = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:]).flatten()
-    best_match_idx = cosine_similarities.argmax()
-    if cosine_similarities[best_match_idx] > 0:
-        return course_content[best_match_idx]
-    return "Sorry, I couldn't find a match. Please rephrase your question."
+def load_courses():
+    """Load the course content and its versions, re-reading the file only when it changed on disk."""
+    stat = os.stat(COURSE_CONTENT_FILE) if os.path.exists(COURSE_CONTENT_FILE) else None
+    file_state = (stat.st_mtime_ns, stat.st_size) if stat else None
+    if "course_versions" not in st.session_state or st.session_state.content_file_state != file_state:
+        st.session_state.uploaded_content = load_json(COURSE_CONTENT_FILE)
+        st.session_state.course_versions = {
+            course_name: course_index.content_version(course_content)
+            for course_name, course_content in st.session_state.uploaded_content.items()
+        }
+        st.session_state.content_file_state = file_state
+
+def find_relevant_answers(question, index, course_content, top_k=course_index.TOP_K, threshold=0.0):
+    """Find the top-k ranked answers and their scores using the course's TF-IDF index."""
+    matches = course_index.search_index(index, question, k=top_k, threshold=threshold)
+    return [(course_content[row], score) for row, score in matches]
+
+def find_most_relevant_answer(question, course_name, course_content, version, top_k=course_index.TOP_K):
+    """Find the most relevant answers, ranked best first, as a single response.
+
+    version is the course's content version, computed once when the content was loaded.
+    """
+    cached = answer_cache.get_answer(course_name, version, top_k, question)
+    if cached is not None:
+        return cached
+    index = course_index.get_course_index(course_name, course_content, version=version)
+    answers = find_relevant_answers(question, index, course_content, top_k)
+    if not answers:
+        response = "Sorry, I couldn't find a match. Please rephrase your question."
+    elif len(answers) == 1:
+        response = answers[0][0]
+    else:
+        response = "\n".join(f"{rank}. {answer}" for rank, (answer, score) in enumerate(answers, start=1))
+    answer_cache.put_answer(course_name, version, top_k, question, response)
+    return response
+
+def find_answer_in_all_courses(question, courses, versions, top_k=course_index.TOP_K):
+    """Find the most relevant answers across every course, ranked best first."""
+    matches = course_index.search_all_courses(courses, question, k=top_k, versions=versions)
+    if not matches:
+        return "Sorry, I couldn't find a match in any course. Please rephrase your question."
+    return "\n".join(
+        f"{rank}. [{course}] {answer}" for rank, (course, answer, score) in enumerate(matches, start=1)
+    )
 
 # Load persistent data
-st.session_state.uploaded_content = load_json(COURSE_CONTENT_FILE)
+load_courses()
 st.session_state.chat_history = load_json(CHAT_HISTORY_FILE)
 
 # Sidebar Navigation
@@ -65,6 +105,7 @@ if menu_option == "Course Management":
             topics = parse_uploaded_content(uploaded_file.read())
             st.session_state.uploaded_content[course_name] = topics
             save_json(st.session_state.uploaded_content, COURSE_CONTENT_FILE)
+            course_index.index_course(course_name, topics)
             st.success(f"Course '{course_name}' has been uploaded successfully!")
 
     # Display existing courses
@@ -74,18 +115,43 @@ if menu_option == "Course Management":
             for topic in topics:
                 st.write(f"- {topic}")
 
+    # Answer a batch of logged questions at once
+    st.subheader("Batch Answer Questions")
+    batch_course = st.selectbox("Course for Batch Answers", list(st.session_state.uploaded_content.keys()))
+    questions_file = st.file_uploader("Upload a TXT file of questions (one per line)", type="txt", key="questions_file")
+    if batch_course and questions_file and st.button("Answer Questions"):
+        questions = parse_uploaded_content(questions_file.read())
+        results = course_index.answer_questions(
+            batch_course, st.session_state.uploaded_content[batch_course], questions
+        )
+        batch_answers = [
+            {"question": question, "answers": [{"answer": answer, "score": score} for answer, score in answers]}
+            for question, answers in zip(questions, results)
+        ]
+        st.success(f"Answered {len(questions)} questions.")
+        st.download_button("Download Answers", json.dumps(batch_answers, indent=4), file_name="batch_answers.json")
+
 elif menu_option == "Student Chat":
     st.title("Chat with AI Teacher")
 
     # Course Selection
-    selected_course = st.selectbox("Select Course", list(st.session_state.uploaded_content.keys()))
+    course_options = list(st.session_state.uploaded_content.keys())
+    if course_options:
+        course_options.append(ALL_COURSES)
+    selected_course = st.selectbox("Select Course", course_options)
     
     if selected_course:
         # Chat Interface
         user_message = st.text_input("Ask a question:")
         if st.button("Send"):
-            course_content = st.session_state.uploaded_content[selected_course]
-            response = find_most_relevant_answer(user_message, course_content)
+            if selected_course == ALL_COURSES:
+                response = find_answer_in_all_courses(
+                    user_message, st.session_state.uploaded_content, st.session_state.course_versions
+                )
+            else:
+                course_content = st.session_state.uploaded_content[selected_course]
+                version = st.session_state.course_versions[selected_course]
+                response = find_most_relevant_answer(user_message, selected_course, course_content, version)
             
             # Save chat history
             chat_entry = {
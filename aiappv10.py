@@ -1,9 +1,8 @@
 import streamlit as st
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 from datetime import datetime
 import json
 import os
+import course_index
 
 # Configure Streamlit page
 st.set_page_config(
@@ -53,15 +52,12 @@ def parse_uploaded_content(file_content):
     lines = [line.strip() for line in content.splitlines() if line.strip()]
     return lines  # Treat each line as a separate topic or content.
 
-def find_most_relevant_answer(question, course_content):
-    """Find the most relevant answer using TF-IDF and cosine similarity."""
-    vectorizer = TfidfVectorizer()
-    # Combine question and content for TF-IDF computation
-    tfidf_matrix = vectorizer.fit_transform([question] + course_content)
-    cosine_similarities = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:]).flatten()
-    best_match_idx = cosine_similarities.argmax()
-    if cosine_similarities[best_match_idx] > 0:  # Check if there's a meaningful match
-        return course_content[best_match_idx]
+def find_most_relevant_answer(question, course_name, course_content):
+    """Find the most relevant answer using the course's persistent TF-IDF index."""
+    index = course_index.get_course_index(course_name, course_content)
+    matches = course_index.search_index(index, question, k=1)
+    if matches:  # Check if there's a meaningful match
+        return course_content[matches[0][0]]
     return "Sorry, I couldn't find an exact match. Please check the content or rephrase your question."
 
 # Load data at startup
@@ -98,7 +94,7 @@ elif menu_option == "Student Chat":
         if user_message and selected_course in st.session_state.uploaded_content:
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             course_content = st.session_state.uploaded_content[selected_course]
-            response = find_most_relevant_answer(user_message, course_content)
+            response = find_most_relevant_answer(user_message, selected_course, course_content)
             
             # Save chat history
             st.session_state.chat_history.append({
@@ -132,6 +128,7 @@ else:  # Resource Center
             parsed_content = parse_uploaded_content(uploaded_file.read())
             st.session_state.uploaded_content[course_name] = parsed_content
             save_course_content()  # Save uploaded content permanently
+            course_index.index_course(course_name, parsed_content)
             st.success(f"Uploaded and saved content for: {course_name}")
         except Exception as e:
             st.error(f"Failed to process the uploaded file: {e}")
@@ -1,9 +1,8 @@
 import streamlit as st
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 from datetime import datetime
 import json
 import os
+import course_index
 
 # File paths for storing data permanently
 COURSE_CONTENT_FILE = 'course_content.json'
@@ -51,13 +50,11 @@ def parse_uploaded_content(file_content):
     return [line.strip() for line in content.splitlines() if line.strip()]  # Each line is treated as content
 
 # Find the most relevant answer using TF-IDF and cosine similarity
-def find_most_relevant_answer(question, course_content):
-    vectorizer = TfidfVectorizer()
-    tfidf_matrix = vectorizer.fit_transform([question] + course_content)
-    cosine_similarities = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:]).flatten()
-    best_match_idx = cosine_similarities.argmax()
-    if cosine_similarities[best_match_idx] > 0:  # Ensure there is a meaningful match
-        return course_content[best_match_idx]
+def find_most_relevant_answer(question, course_name, course_content):
+    index = course_index.get_course_index(course_name, course_content)
+    matches = course_index.search_index(index, question, k=1)
+    if matches:  # Ensure there is a meaningful match
+        return course_content[matches[0][0]]
     return "Sorry, I couldn't find an exact match. Please check the content or rephrase your question."
 
 # Load data at the start of the app
@@ -94,7 +91,7 @@ elif menu_option == "Student Chat":
         if user_message and selected_course in st.session_state.uploaded_content:
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             course_content = st.session_state.uploaded_content[selected_course]
-            response = find_most_relevant_answer(user_message, course_content)
+            response = find_most_relevant_answer(user_message, selected_course, course_content)
             
             # Save chat history
             st.session_state.chat_history.append({
@@ -128,6 +125,7 @@ else:  # Resource Center
             parsed_content = parse_uploaded_content(uploaded_file.read())
             st.session_state.uploaded_content[course_name] = parsed_content
             save_course_content()  # Save permanently
+            course_index.index_course(course_name, parsed_content)
             st.success(f"Uploaded and saved content for: {course_name}")
         except Exception as e:
             st.error(f"Failed to process the uploaded file: {e}")
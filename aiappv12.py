@@ -3,12 +3,16 @@ from langchain_core.messages import AIMessage, HumanMessage
 from langchain_openai import ChatOpenAI
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
-from PyPDF2 import PdfReader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+import pdf_pipeline
+import index_cache
+import page_index
+import course_library
+import llm_clients
+import chat_memory
+import response_cache
+import quiz_bank
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_community.vectorstores import FAISS
 from tavily import TavilyClient
-import hashlib
 from streamlit_pdf_viewer import pdf_viewer
 import tempfile 
 
@@ -18,62 +22,98 @@ openai_api_key = st.secrets['openai_api_key']
 
 web_tool_search = TavilyClient(api_key= tvly_api_key)
 
-st.set_page_config(page_title="AI Professor", page_icon="👨‍🏫" )
-st.title("👨‍🏫 AI Professor")
+CHUNK_SIZE = 10000
+CHUNK_OVERLAP = 1000
+# Keep-alive connections and request timeout of the shared model clients
+LLM_POOL_SIZE = st.secrets.get("llm_pool_size", llm_clients.HTTP_POOL_SIZE)
+LLM_TIMEOUT_SECONDS = st.secrets.get("llm_timeout_seconds", llm_clients.HTTP_TIMEOUT_SECONDS)
+# Prompt tokens allowed for the chat history (running summary plus recent turns)
+HISTORY_TOKEN_BUDGET = st.secrets.get("history_token_budget", chat_memory.HISTORY_TOKEN_BUDGET)
+# Reuse the cached response of a question at least this similar (None = exact matches only)
+RESPONSE_SIMILARITY = st.secrets.get("response_cache_similarity", response_cache.SIMILARITY_THRESHOLD)
 
-def get_pdf_text(pdf_docs):
-    text = ""
-    if isinstance(pdf_docs, list):
-        for pdf in pdf_docs:
-            pdf_reader = PdfReader(pdf)
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-    else:
-        pdf_reader = PdfReader(pdf_docs)
-        for page in pdf_reader.pages:
-            text += page.extract_text()
-    return text
-
-def get_text_chunks(text):
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=10000, chunk_overlap=1000)
-    chunks = text_splitter.split_text(text)
-    return chunks
-
-def get_vector_store(text_chunks):
-    embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001", google_api_key=google_api_key)
-    vector_store = FAISS.from_texts(text_chunks, embedding=embeddings)
-    return vector_store
-
-def get_response(user_query, chat_history, vector_store):
-    template = """
+PROMPT = ChatPromptTemplate.from_template("""
     You are a helpful assistant. Answer the following questions considering the history of the conversation and the document provided:
 
     Context: {context}
     Chat history: {chat_history}
     User question: {user_question}
-    """
+    """)
+
+st.set_page_config(page_title="AI Professor", page_icon="👨‍🏫" )
+st.title("👨‍🏫 AI Professor")
 
-    prompt = ChatPromptTemplate.from_template(template)
+def get_llm():
+    return llm_clients.get_client(
+        ChatOpenAI, LLM_POOL_SIZE, LLM_TIMEOUT_SECONDS,
+        base_url="https://api.groq.com/openai/v1",
+        openai_api_key=openai_api_key,
+        model_name="llama-3.1-8b-instant",
+        temperature=1,
+        max_tokens=1024,
+    )
+
+def get_embeddings():
+    return llm_clients.get_client(
+        GoogleGenerativeAIEmbeddings, model="models/embedding-001", google_api_key=google_api_key
+    )
 
-    llm = ChatOpenAI(
-    base_url = "https://api.groq.com/openai/v1",
-    openai_api_key = openai_api_key,
-    model_name = "llama-3.1-8b-instant",
-    temperature=1,
-    max_tokens=1024
+def get_vector_store(pdf_docs, pdf_hash, previous_vector_store=None):
+    embeddings = get_embeddings()
+    return index_cache.get_or_build_index(
+        pdf_hash, embeddings, CHUNK_SIZE, CHUNK_OVERLAP,
+        lambda: page_index.update_vector_store(previous_vector_store, pdf_docs, embeddings, CHUNK_SIZE, CHUNK_OVERLAP),
     )
-    embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001", google_api_key=google_api_key)
+
+def get_chain_input(user_query, chat_history, vector_store):
     docs = vector_store.similarity_search(user_query)
 
     context = "\n".join(doc.page_content for doc in docs)
 
-    chain = prompt | llm | StrOutputParser()
-    
-    return chain.invoke({
+    return {
         "context": context,
-        "chat_history": chat_history,
+        "chat_history": chat_memory.format_history(st.session_state.chat_memory, chat_history, HISTORY_TOKEN_BUDGET),
         "user_question": user_query,
-    })
+    }
+
+def get_response(user_query, chat_history, vector_store):
+    chain = PROMPT | get_llm() | StrOutputParser()
+    
+    return chain.invoke(get_chain_input(user_query, chat_history, vector_store))
+
+def stream_response(user_query, chat_history, vector_store):
+    """Yield the response text chunk by chunk as the model generates it."""
+    chain = PROMPT | get_llm() | StrOutputParser()
+
+    return chain.stream(get_chain_input(user_query, chat_history, vector_store))
+
+def lookup_response(user_query, document_key, bypass_cache):
+    if document_key is None or bypass_cache:
+        return None, None
+    return response_cache.lookup(document_key, user_query, get_embeddings(), RESPONSE_SIMILARITY)
+
+def answer_with_cache(user_query, chat_history, vector_store, document_key, bypass_cache=False):
+    """Show a cached response for the prompt, or stream a fresh one and cache it."""
+    response, question_vector = lookup_response(user_query, document_key, bypass_cache)
+    if response is not None:
+        st.write(response)
+        return response
+    response = st.write_stream(stream_response(user_query, chat_history, vector_store))
+    if document_key is not None:
+        response_cache.store(document_key, user_query, response, question_vector)
+    return response
+
+def get_cached_response(user_query, chat_history, vector_store, document_key, bypass_cache=False):
+    """Return a cached response for the prompt, or generate one and cache it."""
+    response, question_vector = lookup_response(user_query, document_key, bypass_cache)
+    if response is None:
+        response = get_response(user_query, chat_history, vector_store)
+        if document_key is not None:
+            response_cache.store(document_key, user_query, response, question_vector)
+    return response
+
+def summarize(prompt):
+    return get_llm().invoke(prompt).content
 
 def get_youtube_url(query):
     response = web_tool_search.search(
@@ -90,26 +130,20 @@ def get_youtube_url(query):
     return None
 
 def get_pdfs_hash(pdf_docs):
-    combined_hash = hashlib.md5()
-    if isinstance(pdf_docs, list):
-        for pdf in pdf_docs:
-            content = pdf.read()
-            combined_hash.update(content)
-            pdf.seek(0)  
-    else:
-        content = pdf_docs.read()
-        combined_hash.update(content)
-        pdf_docs.seek(0)  
-    return combined_hash.hexdigest()
+    return pdf_pipeline.hash_pdfs(pdf_docs)
 
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = [
         AIMessage(content="Hello, I am Chatbot professor assistant. How can I help you?"),
     ]
+if "chat_memory" not in st.session_state:
+    st.session_state.chat_memory = chat_memory.new_memory()
 if "vector_store" not in st.session_state:
     st.session_state.vector_store = None
 if "current_pdfs_hash" not in st.session_state:
     st.session_state.current_pdfs_hash = None
+if "library" not in st.session_state:
+    st.session_state.library = course_library.new_library()
 
 for message in st.session_state.chat_history:
     if isinstance(message, AIMessage):
@@ -123,13 +157,16 @@ user_query = st.chat_input("Type your message here...")
 
 with st.sidebar:
         st.title("Menu:")
-        pdf_docs = st.file_uploader("Upload your PDF Files ", accept_multiple_files=False, key="pdf_uploader")
+        pdf_docs = st.file_uploader("Upload your PDF Files ", accept_multiple_files=True, key="pdf_uploader")
         quizz_button= st.button("🗒️ Make a quizz", type="primary")
         video_button = st.button("📺 Search a video on the topic")
         view = st.toggle("👁️ View PDF")
+        bypass_cache = st.checkbox("Fresh answer (skip cache)")
+        st.caption(response_cache.stats_text())
         if view and pdf_docs:
+            pdf_to_view = st.selectbox("Document", pdf_docs, format_func=lambda pdf: pdf.name)
             with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
-                temp_file.write(pdf_docs.read())
+                temp_file.write(pdf_to_view.getvalue())
                 temp_pdf_path = temp_file.name  
 
             pdf_viewer(temp_pdf_path, width=800)
@@ -169,14 +206,22 @@ with st.sidebar:
     )     
             
     
+document_key = None
 if pdf_docs:
         new_hash = get_pdfs_hash(pdf_docs)
         if new_hash != st.session_state.current_pdfs_hash:
-            text = get_pdf_text(pdf_docs)
-            text_chunks = get_text_chunks(text)
-            st.session_state.vector_store = get_vector_store(text_chunks)
+            st.session_state.library = course_library.update_library(
+                st.session_state.library, pdf_docs, get_vector_store
+            )
             st.session_state.current_pdfs_hash = new_hash
-            st.success("The document has been updated!")
+            # Start filling the quiz bank while the student reads or chats
+            quiz_bank.ensure_pool(new_hash, quiz_bank.library_sections(st.session_state.library), summarize)
+            st.success("The documents have been updated!")
+        with st.sidebar:
+            search_scope = st.selectbox("Search in", course_library.document_names(st.session_state.library))
+        st.session_state.vector_store = course_library.get_search_index(st.session_state.library, search_scope)
+        # Responses are cached per set of documents and search scope
+        document_key = (st.session_state.current_pdfs_hash, search_scope)
 
 if user_query is not None and user_query != "": 
     st.session_state.chat_history.append(HumanMessage(content=user_query))
@@ -185,15 +230,27 @@ if user_query is not None and user_query != "":
         st.markdown(user_query,unsafe_allow_html=True)
 
     with st.chat_message("AI"):
-        with st.spinner("Thinking..."):
-            response = (get_response(user_query, st.session_state.chat_history, st.session_state.vector_store))
-            st.write(response)
+        response = answer_with_cache(user_query, st.session_state.chat_history, st.session_state.vector_store, document_key, bypass_cache)
     st.session_state.chat_history.append(AIMessage(content=response))
 
-if pdf_docs is None :
+if not pdf_docs :
     st.write("Please upload your PDF course before starting the chat.")
 
 if quizz_button :
+            # Serve 5 precomputed questions instantly, and top the pool up in the background
+            questions = quiz_bank.sample_quiz(st.session_state.current_pdfs_hash) if pdf_docs else []
+            if pdf_docs:
+                quiz_bank.ensure_pool(
+                    st.session_state.current_pdfs_hash, quiz_bank.library_sections(st.session_state.library), summarize
+                )
+            if questions:
+                response = quiz_bank.format_quiz(questions)
+                with st.chat_message("AI"):
+                    st.write(response)
+                st.session_state.chat_history.append(AIMessage(content=response))
+
+# Until the pool has enough questions, generate the quiz directly
+if quizz_button and not questions :
             with st.spinner("Generating quiz..."):
                 quiz_prompt = """
                 Based on the document content, create a quiz with 5 multiple choice questions.
@@ -211,8 +268,7 @@ if quizz_button :
                 **D)**
                 """ 
                 with st.chat_message("AI"):
-                    response = get_response(quiz_prompt, st.session_state.chat_history, st.session_state.vector_store)
-                    st.write(response)
+                    response = answer_with_cache(quiz_prompt, st.session_state.chat_history, st.session_state.vector_store, document_key, bypass_cache)
                 st.session_state.chat_history.append(AIMessage(content=response))
 
 
@@ -225,11 +281,13 @@ if video_button :
                 Example format: "machine learning neural networks" or "quantum computing basics"
         """
         with  st.chat_message("AI"):
-            response = get_response(video_prompt, st.session_state.chat_history, st.session_state.vector_store)
+            response = get_cached_response(video_prompt, st.session_state.chat_history, st.session_state.vector_store, document_key, bypass_cache)
             youtube_url = get_youtube_url(f"Course on {response}")
             if youtube_url:
                             st.write(f"📺 Here's a video about {response}:")
                             st.video(youtube_url)
                         
                             video_message = f"📺 Here's a video about {response}:\n{youtube_url}"
-                            st.session_state.chat_history.append(AIMessage(content=video_message))  
\ No newline at end of file
+                            st.session_state.chat_history.append(AIMessage(content=video_message))
+
+st.session_state.chat_memory = chat_memory.update_memory(st.session_state.chat_memory, st.session_state.chat_history, summarize)
@@ -2,6 +2,7 @@ import streamlit as st
 from datetime import datetime
 import json
 import os
+import topic_matcher
 
 # Configure Streamlit page
 st.set_page_config(
@@ -30,6 +31,8 @@ if 'courses' not in st.session_state:
     }
 if 'lessons' not in st.session_state:
     st.session_state.lessons = {}
+if 'topic_matchers' not in st.session_state:
+    st.session_state.topic_matchers = {}
 
 def save_chat_history():
     """Save chat history to a JSON file"""
@@ -42,13 +45,21 @@ def load_chat_history():
         with open('chat_history.json', 'r') as f:
             st.session_state.chat_history = json.load(f)
 
+# Function to get the course's topic matcher, rebuilt only when its topics change
+def get_topic_matcher(course):
+    topics = list(st.session_state.lessons.get(course, {}))
+    matcher = st.session_state.topic_matchers.get(course)
+    if matcher is None or matcher["patterns"] != topics:
+        matcher = topic_matcher.build_matcher(topics)
+        st.session_state.topic_matchers[course] = matcher
+    return matcher
+
 # Function to suggest lessons based on keywords
 def suggest_lessons(course, question):
-    suggestions = []
-    for topic, lesson_files in st.session_state.lessons.get(course, {}).items():
-        if topic.lower() in question.lower():  # Basic keyword matching
-            suggestions.append((topic, lesson_files))
-    return suggestions
+    course_lessons = st.session_state.lessons.get(course, {})
+    # Single pass over the question finds every matching topic
+    matched_topics = topic_matcher.find_matches(get_topic_matcher(course), question)
+    return [(topic, course_lessons[topic]) for topic in matched_topics]
 
 # Sidebar for navigation
 st.sidebar.title("AI Teaching Assistant")
@@ -2,6 +2,7 @@ import streamlit as st
 from datetime import datetime
 import json
 import os
+import keyword_index
 
 # Configure Streamlit page
 st.set_page_config(
@@ -30,6 +31,8 @@ if 'courses' not in st.session_state:
     }
 if 'lessons' not in st.session_state:
     st.session_state.lessons = {}
+if 'keyword_indexes' not in st.session_state:
+    st.session_state.keyword_indexes = {}
 
 def save_chat_history():
     """Save chat history to a JSON file"""
@@ -42,16 +45,22 @@ def load_chat_history():
         with open('chat_history.json', 'r') as f:
             st.session_state.chat_history = json.load(f)
 
-def find_relevant_content(question, course):
+def get_keyword_index(course):
+    """Get the inverted index for a course, building it from its lessons if needed"""
+    if course not in st.session_state.keyword_indexes:
+        index = keyword_index.new_keyword_index()
+        for topic, files in st.session_state.lessons.get(course, {}).items():
+            for file in files:
+                keyword_index.add_document(index, topic, file['filename'], file['content'].decode('utf-8'))
+        st.session_state.keyword_indexes[course] = index
+    return st.session_state.keyword_indexes[course]
+
+def find_relevant_content(question, course, top_k=3):
     """Find relevant lesson content based on the question"""
     relevant_content = ""
     if course in st.session_state.lessons:
-        for topic, files in st.session_state.lessons[course].items():
-            for file in files:
-                # Convert byte content to string for searching
-                content_text = file['content'].decode('utf-8')
-                if any(word.lower() in content_text.lower() for word in question.split()):
-                    relevant_content += f"\n**{topic}**:\n{content_text}\n"
+        for doc, score in keyword_index.search(get_keyword_index(course), question, k=top_k):
+            relevant_content += f"\n**{doc['topic']}**:\n{doc['text']}\n"
     return relevant_content if relevant_content else "Sorry, no relevant content found for your question."
 
 # Sidebar for navigation
@@ -83,11 +92,21 @@ if menu_option == "Course Management":
         # Initialize lessons for the course if not already
         if selected_course_for_lesson not in st.session_state.lessons:
             st.session_state.lessons[selected_course_for_lesson] = {}
+        # Fetch the course index before storing the file so it is indexed exactly once
+        course_keyword_index = get_keyword_index(selected_course_for_lesson)
         # Store lesson file under the topic
+        lesson_bytes = lesson_file.read()
         st.session_state.lessons[selected_course_for_lesson].setdefault(lesson_topic, []).append({
             "filename": lesson_file.name,
-            "content": lesson_file.read()
+            "content": lesson_bytes
         })
+        # Index the new file once at upload time
+        keyword_index.add_document(
+            course_keyword_index,
+            lesson_topic,
+            lesson_file.name,
+            lesson_bytes.decode('utf-8')
+        )
         st.success(f"Lesson material '{lesson_file.name}' uploaded under topic '{lesson_topic}'!")
 
     # Display existing courses and their topics
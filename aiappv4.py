@@ -3,9 +3,7 @@ from datetime import datetime
 import json
 import os
 import re
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import numpy as np
+import course_index
 
 # Configure Streamlit page
 st.set_page_config(
@@ -34,16 +32,29 @@ def load_chat_history():
         with open('chat_history.json', 'r') as f:
             st.session_state.chat_history = json.load(f)
 
+def lessons_file_state():
+    """Return the modification time and size of the lessons file, or None if there is none."""
+    if not os.path.exists('lessons.json'):
+        return None
+    stat = os.stat('lessons.json')
+    return (stat.st_mtime_ns, stat.st_size)
+
 def save_lessons():
     """Save lessons to a JSON file for persistence."""
     with open('lessons.json', 'w') as f:
         json.dump(st.session_state.lessons, f)
+    # The lesson index already has this change, so this write is not a reload
+    st.session_state.lessons_file_state = lessons_file_state()
 
 def load_lessons():
-    """Load lessons from JSON file."""
-    if os.path.exists('lessons.json'):
-        with open('lessons.json', 'r') as f:
-            st.session_state.lessons = json.load(f)
+    """Load lessons from JSON file, re-reading it only when it changed on disk."""
+    file_state = lessons_file_state()
+    if file_state is None or file_state == st.session_state.get('lessons_file_state'):
+        return
+    with open('lessons.json', 'r') as f:
+        st.session_state.lessons = json.load(f)
+    st.session_state.lessons_file_state = file_state
+    course_index.reload_lessons(st.session_state.lessons)
 
 def add_lesson(course_name, topic, content):
     """Add new lesson content."""
@@ -51,27 +62,21 @@ def add_lesson(course_name, topic, content):
         st.session_state.lessons[course_name] = {}
     st.session_state.lessons[course_name][topic] = content
     save_lessons()
+    course_index.update_lesson(course_name, topic, content)
 
 def find_relevant_content(question, course_name):
     """Find the most relevant content based on question similarity."""
     if course_name not in st.session_state.lessons:
         return "No lesson content available for this course."
 
-    # Gather all lesson content under the selected course
-    content_list = []
-    topics = []
-    for topic, content in st.session_state.lessons[course_name].items():
-        content_list.append(content)
-        topics.append(topic)
-    
-    # Convert the lesson contents and the question to TF-IDF embeddings for similarity check
-    vectorizer = TfidfVectorizer().fit_transform([question] + content_list)
-    cosine_similarities = cosine_similarity(vectorizer[0:1], vectorizer[1:]).flatten()
-    most_similar_idx = np.argmax(cosine_similarities)
+    # Score the question against the course's incrementally maintained lesson index
+    lessons = st.session_state.lessons[course_name]
+    index = course_index.get_lesson_index(course_name, lessons)
+    matches = course_index.search_lesson_index(index, question, threshold=0.1)  # Threshold for similarity
     
-    # Return the most relevant topic and content
-    if cosine_similarities[most_similar_idx] > 0.1:  # Threshold for similarity
-        return f"**{topics[most_similar_idx]}**: {content_list[most_similar_idx]}"
+    # Return the most relevant topics and content, best first
+    if matches:
+        return "\n\n".join(f"**{topic}**: {lessons[topic]}" for topic, score in matches)
     else:
         return "No relevant content found for your question."
 
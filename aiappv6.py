@@ -18,7 +18,7 @@ install_and_import(REQUIRED_LIBRARIES)
 from datetime import datetime
 import json
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import course_index
 
 # Streamlit page configuration
 st.set_page_config(
@@ -110,11 +110,10 @@ elif menu_option == "Student Chat":
                     "course": selected_course
                 })
                 
-                # Find the most relevant content
+                # Find the top-k most relevant content lines
                 user_tfidf = st.session_state.vectorizer.transform([user_message])
-                similarity_scores = cosine_similarity(user_tfidf, tfidf_matrix).flatten()
-                best_match_index = similarity_scores.argmax()
-                response = content[best_match_index] if similarity_scores[best_match_index] > 0 else "I'm sorry, I don't have information on that."
+                matches = course_index.top_k_matches(tfidf_matrix, user_tfidf)
+                response = "\n".join(content[index] for index, score in matches) if matches else "I'm sorry, I don't have information on that."
 
                 # Display response and save chat history
                 st.write(f"Teacher: {response}")
@@ -5,7 +5,7 @@ import subprocess
 from datetime import datetime
 import json
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import course_index
 
 # Dependency management
 REQUIRED_LIBRARIES = ["scikit-learn"]
@@ -98,11 +98,10 @@ elif menu_option == "Student Chat":
                 
                 # Generate AI response based on content
                 user_tfidf = st.session_state.vectorizer.transform([user_question])
-                similarity_scores = cosine_similarity(user_tfidf, tfidf_matrix).flatten()
-                best_match_index = similarity_scores.argmax()
+                matches = course_index.top_k_matches(tfidf_matrix, user_tfidf)
                 
-                if similarity_scores[best_match_index] > 0:
-                    ai_response = content[best_match_index]
+                if matches:
+                    ai_response = "\n".join(content[index] for index, score in matches)
                 else:
                     ai_response = "I'm sorry, I don't have information on that question."
 
@@ -32,10 +32,11 @@ def load_chat_history():
 
 def process_question(question, lessons):
     """Process the question and return a relevant response based on uploaded lessons."""
-    question = question.lower()
+    # Compile the question pattern once and reuse it for every lesson
+    question_pattern = re.compile(r'\b' + re.escape(question.lower()) + r'\b')
     for title, content in lessons.items():
         content_lower = content.lower()
-        if re.search(r'\b' + re.escape(question) + r'\b', content_lower):
+        if question_pattern.search(content_lower):
             return f"Based on the lesson '{title}', here's some information: {content}"
     return "I'm sorry, but I couldn't find an answer based on the uploaded lessons."
 
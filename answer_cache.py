@@ -0,0 +1,50 @@
+import threading
+from collections import OrderedDict
+
+from course_index import content_version
+from ttl_cache import get_entry, normalize_question, put_entry
+
+# Cache limits, shared by every session served by this process
+CACHE_SIZE = 1024
+CACHE_TTL_SECONDS = 3600
+
+# (course, content version, top-k, normalized question) -> (expiry time, answer)
+_cache = OrderedDict()
+# Content version each course's cached answers were computed from
+_course_versions = {}
+_lock = threading.Lock()
+stats = {"hits": 0, "misses": 0}
+
+
+# Helper Functions
+def get_answer(course_name, version, top_k, question):
+    """Return a cached answer formatted for top_k matches, or None on a miss or an expired entry."""
+    key = (course_name, version, top_k, normalize_question(question))
+    with _lock:
+        answer = get_entry(_cache, key)
+        stats["misses" if answer is None else "hits"] += 1
+        return answer
+
+
+def put_answer(course_name, version, top_k, question, answer):
+    """Cache an answer, evicting the least recently used entries beyond the size limit."""
+    key = (course_name, version, top_k, normalize_question(question))
+    with _lock:
+        put_entry(_cache, key, answer, CACHE_TTL_SECONDS, CACHE_SIZE)
+        _course_versions[course_name] = version
+
+
+def invalidate_course(course_name):
+    """Drop every cached answer for a course."""
+    with _lock:
+        for key in [key for key in _cache if key[0] == course_name]:
+            del _cache[key]
+        _course_versions.pop(course_name, None)
+
+
+def invalidate_changed_courses(course_contents):
+    """Drop cached answers for courses whose content no longer matches what was cached."""
+    for course_name, course_content in course_contents.items():
+        cached_version = _course_versions.get(course_name)
+        if cached_version is not None and cached_version != content_version(course_content):
+            invalidate_course(course_name)
@@ -0,0 +1,74 @@
+from langchain.schema import AIMessage, HumanMessage
+
+# Recent turns (a question and its answer) quoted verbatim in the prompt
+RECENT_TURNS = 4
+# Older turns are folded into the running summary this many at a time
+SUMMARY_EVERY_TURNS = 3
+# Prompt tokens allowed for the summary and recent turns together
+HISTORY_TOKEN_BUDGET = 1500
+# Rough characters per token, to budget without a tokenizer round trip
+CHARS_PER_TOKEN = 4
+
+SUMMARY_PROMPT = """
+    Update the summary of a tutoring conversation with the new messages below.
+    Keep the topics covered, what the student struggled with, and any facts they asked to remember.
+    Answer with the updated summary only, in at most 150 words.
+
+    Current summary: {summary}
+    New messages:
+    {messages}
+    """
+
+
+# Helper Functions
+def new_memory():
+    """Return empty memory: the running summary and how many messages it covers."""
+    return {"summary": "", "summarized": 0}
+
+
+def estimate_tokens(text):
+    """Return an approximate token count for text."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def format_message(message):
+    """Render one chat message as a prompt line."""
+    if isinstance(message, HumanMessage):
+        return f"Student: {message.content}"
+    if isinstance(message, AIMessage):
+        return f"Assistant: {message.content}"
+    return message.content
+
+
+def update_memory(memory, messages, summarize, recent_turns=RECENT_TURNS, every_turns=SUMMARY_EVERY_TURNS):
+    """Fold messages that left the recent window into the summary, a few turns at a time.
+
+    summarize(prompt) returns the model's text. It is only called once
+    every_turns turns have piled up outside the window, so most turns cost
+    no extra request.
+    """
+    window_start = max(0, len(messages) - 2 * recent_turns)
+    if window_start - memory["summarized"] < 2 * every_turns:
+        return memory
+    new_messages = "\n".join(format_message(message) for message in messages[memory["summarized"]:window_start])
+    summary = summarize(SUMMARY_PROMPT.format(summary=memory["summary"] or "(none)", messages=new_messages))
+    return {"summary": summary.strip(), "summarized": window_start}
+
+
+def format_history(memory, messages, token_budget=HISTORY_TOKEN_BUDGET):
+    """Return the summary plus the newest unsummarized messages that fit in token_budget."""
+    lines = []
+    used = 0
+    if memory["summary"]:
+        summary_line = f"Summary of the earlier conversation: {memory['summary']}"
+        summary_line = summary_line[:token_budget * CHARS_PER_TOKEN // 2]  # Leave room for recent turns
+        used = estimate_tokens(summary_line)
+    for message in reversed(messages[memory["summarized"]:]):
+        line = format_message(message)
+        if used + estimate_tokens(line) > token_budget:
+            break
+        lines.append(line)
+        used += estimate_tokens(line)
+    if memory["summary"]:
+        lines.append(summary_line)
+    return "\n".join(reversed(lines))
@@ -0,0 +1,70 @@
+import math
+
+import faiss
+from langchain.vectorstores import FAISS
+
+# Index types: exact float32 search, inverted lists, or inverted lists of product-quantized codes
+INDEX_TYPES = ("flat", "ivf", "ivfpq")
+# Vectors needed before an index type is worth training; smaller indexes stay flat
+MIN_VECTORS = {"ivf": 1000, "ivfpq": 10000}
+# faiss asks for about 39 training vectors per centroid
+TRAINING_VECTORS_PER_LIST = 39
+# Inverted lists scanned per query: higher means better recall, slower search
+IVF_NPROBE = 8
+# Sub-vectors per PQ code and bits per sub-vector (16 x 8 bits = 16 bytes per vector)
+PQ_SUBQUANTIZERS = 16
+PQ_BITS = 8
+
+
+# Helper Functions
+def ivf_lists(num_vectors):
+    """Return the number of inverted lists for an index of num_vectors."""
+    return max(1, min(int(4 * math.sqrt(num_vectors)), num_vectors // TRAINING_VECTORS_PER_LIST))
+
+
+def pq_subquantizers(dimensions, subquantizers=PQ_SUBQUANTIZERS):
+    """Return the largest sub-vector count up to subquantizers that divides the dimensions."""
+    return max(m for m in range(1, min(subquantizers, dimensions) + 1) if dimensions % m == 0)
+
+
+def build_faiss_index(vectors, index_type="flat", nlist=None, nprobe=IVF_NPROBE):
+    """Train (if needed) and fill a faiss index of the given type with float32 vectors."""
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type {index_type!r}, expected one of {INDEX_TYPES}")
+    num_vectors, dimensions = vectors.shape
+    if index_type == "flat" or num_vectors < MIN_VECTORS[index_type]:
+        index = faiss.IndexFlatL2(dimensions)
+        index.add(vectors)
+        return index
+    nlist = nlist or ivf_lists(num_vectors)
+    quantizer = faiss.IndexFlatL2(dimensions)
+    if index_type == "ivf":
+        index = faiss.IndexIVFFlat(quantizer, dimensions, nlist)
+    else:
+        index = faiss.IndexIVFPQ(quantizer, dimensions, nlist, pq_subquantizers(dimensions), PQ_BITS)
+    index.train(vectors)
+    index.add(vectors)
+    index.nprobe = nprobe
+    return index
+
+
+def compress_vector_store(vector_store, index_type="ivfpq", nlist=None, nprobe=IVF_NPROBE):
+    """Return a copy of a flat FAISS vector store searched through a compressed index.
+
+    The documents and ids are kept; only the vectors are re-indexed. The
+    result can grow with add_embeddings but cannot be merged into, so
+    rebuild it from the flat indexes when documents are removed.
+    """
+    if vector_store is None or index_type == "flat":
+        return vector_store
+    vectors = vector_store.index.reconstruct_n(0, vector_store.index.ntotal)
+    index = build_faiss_index(vectors, index_type, nlist, nprobe)
+    return FAISS(
+        vector_store.embeddings, index, vector_store.docstore, dict(vector_store.index_to_docstore_id)
+    )
+
+
+def set_nprobe(vector_store, nprobe):
+    """Set how many inverted lists a compressed vector store scans per query."""
+    if vector_store is not None and isinstance(vector_store.index, faiss.IndexIVF):
+        vector_store.index.nprobe = nprobe
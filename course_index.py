@@ -0,0 +1,481 @@
+import hashlib
+import heapq
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+# Directory for storing fitted course indexes, next to course_content.json
+INDEX_DIR = "course_index"
+
+# Default number of ranked answers returned per question
+TOP_K = 3
+
+# Worker threads used to query courses in parallel for an all-courses search
+SEARCH_WORKERS = 4
+
+# Questions scored per sparse product in a batch, bounding the score matrix
+# to about this many rows times the course's line count
+QUERY_BLOCK_ROWS = 256
+
+# Arrays stored per course as .npy files and opened memory-mapped, so every
+# session and server process shares the same OS page cache pages. The matrix
+# is stored column by column (CSC), i.e. as an inverted index from each term
+# to the lines containing it.
+INDEX_ARRAYS = ("terms", "idf", "data", "indices", "indptr")
+
+# File in a course's index directory naming its current generation folder,
+# and how often a load retries when a concurrent save replaces it
+CURRENT_FILE = "current"
+LOAD_ATTEMPTS = 3
+# Age after which a generation folder that is not current is treated as left
+# over from concurrent saves, rather than one still being written
+STALE_GENERATION_SECONDS = 3600
+
+# Fitted indexes already loaded by this process, keyed by course name
+_loaded_indexes = {}
+
+# Longest token indexed, in characters. Terms are stored in a fixed-width
+# array, so one long run-together token would otherwise pad every entry.
+MAX_TERM_LENGTH = 32
+# Tokens of 2 to MAX_TERM_LENGTH word characters; longer runs are skipped
+TOKEN_PATTERN = rf"(?u)\b\w{{2,{MAX_TERM_LENGTH}}}\b"
+
+# Tokenizer matching the one TfidfVectorizer fits course content with
+_analyzer = TfidfVectorizer(token_pattern=TOKEN_PATTERN).build_analyzer()
+
+
+# Helper Functions
+def content_version(course_content):
+    """Return a short fingerprint of a course's content lines."""
+    digest = hashlib.md5()
+    for line in course_content:
+        digest.update(line.encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def course_index_path(course_name, index_dir=INDEX_DIR):
+    """Return the directory holding the index files for a course."""
+    folder = hashlib.md5(course_name.encode("utf-8")).hexdigest()
+    return os.path.join(index_dir, folder)
+
+
+def build_index(course_content):
+    """Fit a TF-IDF vectorizer once over the course content."""
+    vectorizer = TfidfVectorizer(token_pattern=TOKEN_PATTERN)
+    try:
+        # Term-major, so a question only visits the lines sharing one of its terms
+        matrix = vectorizer.fit_transform(course_content).tocsc()
+    except ValueError:
+        # No line has an indexable word, so nothing can match
+        return {
+            "terms": np.array([], dtype="S1"),
+            "idf": np.array([], dtype=np.float64),
+            "matrix": sparse.csc_matrix((len(course_content), 0)),
+            "version": content_version(course_content),
+        }
+    # Columns follow sorted term order, which UTF-8 byte order preserves
+    terms = np.array([term.encode("utf-8") for term in vectorizer.get_feature_names_out()])
+    index = {
+        "terms": terms,
+        "idf": vectorizer.idf_,
+        "matrix": matrix,
+        "version": content_version(course_content),
+    }
+    return index
+
+
+def _save_array(file_path, array):
+    """Write one array to a .npy file."""
+    with open(file_path, "wb") as f:
+        np.save(f, array)
+
+
+def _read_current(path):
+    """Return the name of a course's current generation folder, or None if it has none."""
+    try:
+        with open(os.path.join(path, CURRENT_FILE), "r") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def _remove_path(old_path):
+    """Delete a file or folder, best effort: what cannot be removed yet goes on a later save."""
+    if os.path.isdir(old_path):
+        shutil.rmtree(old_path, ignore_errors=True)
+    else:
+        try:
+            os.remove(old_path)
+        except OSError:
+            pass
+
+
+def _remove_old_files(path, previous, generation):
+    """Delete the generation a save replaced, plus leftovers no save is still using.
+
+    Generations written by concurrent saves are left alone until they are
+    STALE_GENERATION_SECONDS old, so a save never deletes one that another
+    thread or process is writing or has just made current. Files of the older
+    single-folder format (vocabulary.json, matrix.npz) are removed too.
+    """
+    current = _read_current(path)
+    now = time.time()
+    for name in os.listdir(path):
+        old_path = os.path.join(path, name)
+        if name in (CURRENT_FILE, generation, current) or name.startswith(".tmp-"):
+            continue
+        if name == previous or not os.path.isdir(old_path):
+            _remove_path(old_path)
+        elif now - os.path.getmtime(old_path) > STALE_GENERATION_SECONDS:
+            _remove_path(old_path)
+
+
+def save_index(course_name, index, index_dir=INDEX_DIR):
+    """Save the sorted vocabulary, IDF weights and CSC matrix arrays to disk.
+
+    Every save writes a complete new generation folder, then swaps the
+    "current" pointer file to it in one rename. Readers therefore always see
+    the arrays and metadata of a single save, never a mix of two. Returns the
+    path of the new generation folder.
+    """
+    path = course_index_path(course_name, index_dir)
+    os.makedirs(path, exist_ok=True)
+    generation_path = tempfile.mkdtemp(dir=path, prefix="gen-")
+    matrix = index["matrix"]
+    arrays = {
+        "terms": index["terms"],
+        "idf": index["idf"],
+        "data": matrix.data,
+        "indices": matrix.indices,
+        "indptr": matrix.indptr,
+    }
+    for name in INDEX_ARRAYS:
+        _save_array(os.path.join(generation_path, f"{name}.npy"), arrays[name])
+    with open(os.path.join(generation_path, "meta.json"), "w") as f:
+        json.dump({"course": course_name, "version": index["version"], "shape": list(matrix.shape)}, f)
+    generation = os.path.basename(generation_path)
+    previous = _read_current(path)
+    fd, temp_path = tempfile.mkstemp(dir=path, prefix=".tmp-")
+    with os.fdopen(fd, "w") as f:
+        f.write(generation)
+    os.replace(temp_path, os.path.join(path, CURRENT_FILE))
+    _remove_old_files(path, previous, generation)
+    return generation_path
+
+
+def _load_generation(generation_path):
+    """Open the arrays of one saved generation memory-mapped."""
+    with open(os.path.join(generation_path, "meta.json"), "r") as f:
+        meta = json.load(f)
+    arrays = {
+        name: np.load(os.path.join(generation_path, f"{name}.npy"), mmap_mode="r") for name in INDEX_ARRAYS
+    }
+    matrix = sparse.csc_matrix(
+        (arrays["data"], arrays["indices"], arrays["indptr"]), shape=tuple(meta["shape"]), copy=False
+    )
+    return {"terms": arrays["terms"], "idf": arrays["idf"], "matrix": matrix, "version": meta["version"]}
+
+
+def load_index(course_name, index_dir=INDEX_DIR):
+    """Open a saved course index memory-mapped, or return None if there is none."""
+    path = course_index_path(course_name, index_dir)
+    for _ in range(LOAD_ATTEMPTS):
+        generation = _read_current(path)
+        if generation is None:
+            return None
+        try:
+            return _load_generation(os.path.join(path, generation))
+        except FileNotFoundError:
+            continue  # Another process saved and removed this generation meanwhile; re-read the pointer
+    return None
+
+
+def index_course(course_name, course_content, index_dir=INDEX_DIR):
+    """Fit, save and cache the index for a course. Call whenever a course is saved."""
+    index = build_index(course_content)
+    generation_path = save_index(course_name, index, index_dir)
+    # Serve from the memory-mapped files rather than this process's private copy
+    try:
+        index = _load_generation(generation_path)
+    except FileNotFoundError:
+        pass  # A concurrent save already replaced this generation, so keep the copy just built
+    _loaded_indexes[course_name] = index
+    return index
+
+
+def transform_questions(index, questions):
+    """Turn questions into L2-normalized TF-IDF rows using the index's stored vocabulary."""
+    terms = index["terms"]
+    rows, keys = [], []
+    for row, question in enumerate(questions):
+        for token in _analyzer(question):
+            key = token.encode("utf-8")
+            if len(key) <= terms.itemsize:
+                rows.append(row)
+                keys.append(key)
+    keys = np.array(keys, dtype=terms.dtype)
+    cols = np.searchsorted(terms, keys)
+    found = cols < len(terms)
+    found[found] = terms[cols[found]] == keys[found]
+    counts = sparse.csr_matrix(
+        (np.ones(found.sum()), (np.array(rows, dtype=np.int64)[found], cols[found])),
+        shape=(len(questions), len(terms)),
+    )
+    return normalize(counts.multiply(np.asarray(index["idf"])).tocsr())
+
+
+def get_course_index(course_name, course_content, index_dir=INDEX_DIR, version=None):
+    """Return the index for a course, loading it from disk or rebuilding it if stale.
+
+    The index is checked against the content fingerprint, so an edit made by
+    another process is picked up even when the number of lines is unchanged.
+    Pass the version computed when the content was loaded to skip hashing
+    the whole course on every question.
+    """
+    version = version or content_version(course_content)
+    index = _loaded_indexes.get(course_name)
+    if index is not None and index["version"] == version:
+        return index
+    index = load_index(course_name, index_dir)
+    if index is not None and index["version"] == version:
+        _loaded_indexes[course_name] = index
+        return index
+    return index_course(course_name, course_content, index_dir)
+
+
+def _top_k(rows, values, k, threshold):
+    """Return up to k (row, score) pairs scoring above the threshold, best first."""
+    keep = values > threshold
+    rows, values = rows[keep], values[keep]
+    if values.size > k:
+        top = np.argpartition(-values, k - 1)[:k]
+        rows, values = rows[top], values[top]
+    order = np.argsort(-values, kind="stable")
+    return [(int(rows[i]), float(values[i])) for i in order]
+
+
+def top_k_matches_batch(matrix, query_matrix, k=TOP_K, threshold=0.0, block_rows=QUERY_BLOCK_ROWS):
+    """Return the top-k (row, score) matches for every query row, block_rows queries per product.
+
+    Rows of both matrices must be L2-normalized, so the sparse matrix-matrix
+    product gives cosine similarities. A CSC matrix is multiplied through its
+    term-major transpose without converting it. Questions share common words with most
+    lines, so each block's scores are nearly dense; only the top-k of every
+    row is kept before the next block is scored.
+    """
+    matches = []
+    for block_start in range(0, query_matrix.shape[0], block_rows):
+        scores = (query_matrix[block_start:block_start + block_rows] @ matrix.T).tocsr()
+        matches.extend(
+            _top_k(scores.indices[start:end], scores.data[start:end], k, threshold)
+            for start, end in zip(scores.indptr[:-1], scores.indptr[1:])
+        )
+    return matches
+
+
+def top_k_matches(matrix, query_vector, k=TOP_K, threshold=0.0):
+    """Return up to k (row, score) pairs for a single query vector, best first."""
+    return top_k_matches_batch(matrix, query_vector, k, threshold)[0]
+
+
+def search_index(index, question, k=TOP_K, threshold=0.0):
+    """Return the top-k (row, score) matches for a question against a course index."""
+    return search_index_batch(index, [question], k, threshold)[0]
+
+
+def search_index_batch(index, questions, k=TOP_K, threshold=0.0):
+    """Return the top-k (row, score) matches for each of many questions."""
+    if not questions:
+        return []
+    if not len(index["terms"]):
+        return [[] for _ in questions]  # Course without indexable words
+    query_matrix = transform_questions(index, questions)
+    return top_k_matches_batch(index["matrix"], query_matrix, k, threshold)
+
+
+def answer_questions(course_name, course_content, questions, k=TOP_K, threshold=0.0):
+    """Answer many questions for a course at once, for evaluations and FAQ pre-answering.
+
+    Returns one list of (content line, score) pairs per question, best first.
+    """
+    index = get_course_index(course_name, course_content)
+    return [
+        [(course_content[row], score) for row, score in matches]
+        for matches in search_index_batch(index, questions, k, threshold)
+    ]
+
+
+
+def search_all_courses(courses, question, k=TOP_K, threshold=0.0, max_workers=SEARCH_WORKERS, versions=None):
+    """Search every course's own index and merge the per-course top-k lists.
+
+    Courses are queried in parallel and their ranked lists are merged with a
+    heap, so no combined matrix over all courses is ever built. versions maps
+    course names to their content versions, if already known. Returns
+    (course, content line, score) triples, best first.
+    """
+    def search_course(course_name):
+        course_content = courses[course_name]
+        if not course_content:
+            return []
+        index = get_course_index(course_name, course_content, version=(versions or {}).get(course_name))
+        return [
+            (course_name, course_content[row], score)
+            for row, score in search_index(index, question, k, threshold)
+        ]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        per_course = list(executor.map(search_course, courses))
+    merged = heapq.merge(*per_course, key=lambda match: match[2], reverse=True)
+    return [match for _, match in zip(range(k), merged)]
+
+# Incremental lesson indexes, keyed by course name
+HASH_FEATURES = 2 ** 18
+# Share of lessons that may change before every row is reweighted with the
+# current IDF. Until then only the changed lessons are weighted, so an edit
+# costs one row instead of the whole course, and unchanged rows keep slightly
+# older IDF weights.
+REWEIGHT_FRACTION = 0.1
+
+_hasher = HashingVectorizer(n_features=HASH_FEATURES, alternate_sign=False, norm=None)
+_lesson_indexes = {}
+
+
+def new_lesson_index():
+    """Return an empty incremental index of hashed term counts."""
+    return {
+        "rows": {},
+        "hashes": {},
+        "df": np.zeros(HASH_FEATURES, dtype=np.int64),
+        # (topics, weighted rows, topic -> row) from the last full reweighting
+        "weighted": None,
+        # Lessons added or edited since then, weighted one by one, and the
+        # reweighted rows they replaced or that were removed
+        "pending": {},
+        "dropped": set(),
+    }
+
+
+def _lesson_hash(content):
+    """Return a fingerprint of a lesson's content."""
+    return hashlib.md5(content.encode("utf-8")).hexdigest()
+
+
+def _weight_rows(index, counts):
+    """Return L2-normalized TF-IDF rows for hashed term counts."""
+    return normalize(counts.multiply(_lesson_idf(index)).tocsr())
+
+
+def add_to_lesson_index(index, topic, content):
+    """Add or replace one lesson, touching only that lesson's terms."""
+    remove_from_lesson_index(index, topic)
+    row = _hasher.transform([content]).tocsr()
+    index["rows"][topic] = row
+    index["hashes"][topic] = _lesson_hash(content)
+    index["df"][row.indices] += 1
+    if index["weighted"] is not None:
+        index["pending"][topic] = _weight_rows(index, row)
+
+
+def remove_from_lesson_index(index, topic):
+    """Remove one lesson and its document-frequency counts from the index."""
+    row = index["rows"].pop(topic, None)
+    index["hashes"].pop(topic, None)
+    index["pending"].pop(topic, None)
+    if row is not None:
+        index["df"][row.indices] -= 1
+        if index["weighted"] is not None and topic in index["weighted"][2]:
+            index["dropped"].add(topic)
+
+
+def _lesson_idf(index):
+    """Return smoothed IDF weights from the running document frequencies."""
+    num_docs = len(index["rows"])
+    return np.log((1 + num_docs) / (1 + index["df"])) + 1
+
+
+def _weighted_lessons(index):
+    """Return (topics, weighted rows, topic -> row), reweighting every row once enough lessons changed."""
+    changed = len(index["pending"]) + len(index["dropped"])
+    if index["weighted"] is None or changed > REWEIGHT_FRACTION * len(index["rows"]):
+        topics = list(index["rows"])
+        weighted = _weight_rows(index, sparse.vstack([index["rows"][topic] for topic in topics])).tocsc()
+        index["weighted"] = (topics, weighted, {topic: row for row, topic in enumerate(topics)})
+        index["pending"] = {}
+        index["dropped"] = set()
+    return index["weighted"]
+
+
+def search_lesson_index(index, question, k=TOP_K, threshold=0.0):
+    """Return the top-k (topic, score) matches for a question against a lesson index."""
+    if not index["rows"]:
+        return []
+    topics, weighted, _ = _weighted_lessons(index)
+    query_vector = _weight_rows(index, _hasher.transform([question]))
+    # Ask for extra matches so removed or edited lessons can be skipped
+    matches = [
+        (topics[row], score)
+        for row, score in top_k_matches(weighted, query_vector, k + len(index["dropped"]), threshold)
+        if topics[row] not in index["dropped"]
+    ]
+    if index["pending"]:
+        pending_topics = list(index["pending"])
+        pending = sparse.vstack([index["pending"][topic] for topic in pending_topics]).tocsr()
+        matches += [
+            (pending_topics[row], score) for row, score in top_k_matches(pending, query_vector, k, threshold)
+        ]
+    return heapq.nlargest(k, matches, key=lambda match: match[1])
+
+
+def get_lesson_index(course_name, lessons):
+    """Return the incremental index for a course, building it from its lessons on first use.
+
+    Later edits reach it through update_lesson and remove_lesson, or through
+    reload_lessons when lessons.json changed on disk, so a query never has to
+    look at every lesson.
+    """
+    if course_name not in _lesson_indexes:
+        sync_lesson_index(course_name, lessons)
+    return _lesson_indexes[course_name]
+
+
+def sync_lesson_index(course_name, lessons):
+    """Bring a course's index in line with its lessons, reindexing only the ones that changed.
+
+    Lessons are compared by content fingerprint, so edits saved by another
+    process are picked up even when the number of lessons is unchanged.
+    """
+    index = _lesson_indexes.setdefault(course_name, new_lesson_index())
+    for topic in set(index["rows"]) - set(lessons):
+        remove_from_lesson_index(index, topic)
+    for topic, content in lessons.items():
+        if index["hashes"].get(topic) != _lesson_hash(content):
+            add_to_lesson_index(index, topic, content)
+    return index
+
+
+def reload_lessons(lessons_by_course):
+    """Resync every loaded lesson index after the lessons were re-read from disk."""
+    for course_name in list(_lesson_indexes):
+        sync_lesson_index(course_name, lessons_by_course.get(course_name, {}))
+
+
+def update_lesson(course_name, topic, content):
+    """Add or edit a lesson in an already loaded course index."""
+    if course_name in _lesson_indexes:
+        add_to_lesson_index(_lesson_indexes[course_name], topic, content)
+
+
+def remove_lesson(course_name, topic):
+    """Delete a lesson from an already loaded course index."""
+    if course_name in _lesson_indexes:
+        remove_from_lesson_index(_lesson_indexes[course_name], topic)
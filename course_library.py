@@ -0,0 +1,100 @@
+from langchain.vectorstores import FAISS
+
+import compressed_index
+import pdf_pipeline
+
+# Search scope covering every document of a library
+ALL_DOCUMENTS = "All documents"
+
+
+# Helper Functions
+def new_library():
+    """Return an empty course library."""
+    return {"documents": {}, "merged": None, "index_type": "flat"}
+
+
+def copy_vector_store(vector_store):
+    """Return an independent copy of a FAISS vector store."""
+    return FAISS.deserialize_from_bytes(
+        vector_store.serialize_to_bytes(), vector_store.embeddings, allow_dangerous_deserialization=True
+    )
+
+
+def merge_into(merged, vector_store):
+    """Merge a document's index into the course index and return the course index.
+
+    FAISS merge_from moves the vectors out of the source index, so a copy is
+    merged to keep the document's own index searchable.
+    """
+    if vector_store is None:
+        return merged
+    if merged is None:
+        return copy_vector_store(vector_store)
+    merged.merge_from(copy_vector_store(vector_store))
+    return merged
+
+
+def merge_documents(documents):
+    """Merge per-document indexes into one course-level index."""
+    merged = None
+    for document in documents.values():
+        merged = merge_into(merged, document["vector_store"])
+    return merged
+
+
+def update_library(library, pdfs, get_document_index, on_document=None, index_type="flat"):
+    """Bring a course library in line with the current uploads, indexing only new documents.
+
+    get_document_index(pdf, pdf_hash, previous_vector_store) returns the index
+    for one PDF. previous_vector_store is a copy of the index of an earlier
+    upload with the same file name, so a revised edition can be updated page
+    by page without modifying the library it came from.
+    Documents already in the library keep their index. New ones are merged
+    into the course index with merge_from. Removing a document rebuilds the
+    course index from the remaining sub-indexes without re-embedding anything.
+    on_document(pdf_hash, document), if given, is called as each document is ready.
+    With a compressed index_type ("ivf" or "ivfpq"), the course index is
+    retrained from the flat sub-indexes whenever documents are added or removed.
+    """
+    library = library or new_library()
+    previous_by_name = {document["name"]: document for document in library["documents"].values()}
+    documents = {}
+    for pdf in pdfs:
+        pdf_hash = pdf_pipeline.hash_pdf(pdf)
+        document = library["documents"].get(pdf_hash)
+        if document is None:
+            previous = previous_by_name.get(pdf.name)
+            previous_store = previous["vector_store"] if previous is not None else None
+            if previous_store is not None:
+                # Updated on a copy, so the current library is untouched if indexing stops partway
+                previous_store = copy_vector_store(previous_store)
+            document = {"name": pdf.name, "vector_store": get_document_index(pdf, pdf_hash, previous_store)}
+        documents[pdf_hash] = document
+        if on_document is not None:
+            on_document(pdf_hash, document)
+
+    added = [pdf_hash for pdf_hash in documents if pdf_hash not in library["documents"]]
+    removed = [pdf_hash for pdf_hash in library["documents"] if pdf_hash not in documents]
+    merged = library["merged"]
+    # A trained compressed index cannot merge_from the flat sub-indexes, so it is retrained
+    retrain = added and index_type != "flat"
+    if removed or retrain or merged is None or library.get("index_type", "flat") != index_type:
+        merged = compressed_index.compress_vector_store(merge_documents(documents), index_type)
+    else:
+        for pdf_hash in added:
+            merged = merge_into(merged, documents[pdf_hash]["vector_store"])
+    return {"documents": documents, "merged": merged, "index_type": index_type}
+
+
+def document_names(library):
+    """Return the search scopes of a library: the whole library, then each document."""
+    return [ALL_DOCUMENTS] + [document["name"] for document in library["documents"].values()]
+
+
+def get_search_index(library, scope=ALL_DOCUMENTS):
+    """Return the index to search for a scope: the merged course index or one document's index."""
+    if scope != ALL_DOCUMENTS:
+        for document in library["documents"].values():
+            if document["name"] == scope:
+                return document["vector_store"]
+    return library["merged"]
@@ -0,0 +1,61 @@
+import hashlib
+import sqlite3
+from contextlib import closing
+
+import numpy as np
+
+import embedding_scheduler
+from index_cache import embedding_model_name
+
+# SQLite file holding one embedding vector per (model, chunk text)
+EMBEDDING_CACHE_FILE = "embedding_cache.sqlite3"
+# Keys looked up per query, below SQLite's bound-parameter limit
+LOOKUP_BATCH_SIZE = 500
+
+
+# Helper Functions
+def chunk_key(model_name, chunk):
+    """Return the content address of a chunk's embedding under a given model."""
+    return hashlib.sha256(f"{model_name}\n{chunk}".encode("utf-8")).hexdigest()
+
+
+def _connect(cache_file):
+    """Open the cache database, creating its table if needed."""
+    conn = sqlite3.connect(cache_file, timeout=30)
+    conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+    return conn
+
+
+def lookup_embeddings(keys, cache_file=EMBEDDING_CACHE_FILE):
+    """Return a {key: vector} dict for the keys already in the cache."""
+    found = {}
+    with closing(_connect(cache_file)) as conn:
+        for start in range(0, len(keys), LOOKUP_BATCH_SIZE):
+            batch = keys[start:start + LOOKUP_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            rows = conn.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch)
+            for key, vector in rows:
+                found[key] = np.frombuffer(vector, dtype=np.float32).tolist()
+    return found
+
+
+def store_embeddings(vectors_by_key, cache_file=EMBEDDING_CACHE_FILE):
+    """Save freshly computed vectors to the cache."""
+    with closing(_connect(cache_file)) as conn, conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+            [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in vectors_by_key.items()],
+        )
+
+
+def embed_documents(chunks, embeddings, cache_file=EMBEDDING_CACHE_FILE):
+    """Embed chunks, sending only cache misses to the embedding API."""
+    model_name = embedding_model_name(embeddings)
+    keys = [chunk_key(model_name, chunk) for chunk in chunks]
+    vectors = lookup_embeddings(keys, cache_file)
+    missing = {key: chunk for key, chunk in zip(keys, chunks) if key not in vectors}
+    if missing:
+        fresh = dict(zip(missing, embedding_scheduler.embed_texts(list(missing.values()), embeddings)))
+        store_embeddings(fresh, cache_file)
+        vectors.update(fresh)
+    return [vectors[key] for key in keys]
@@ -0,0 +1,60 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Chunks per embedding request, and requests in flight per upload
+BATCH_SIZE = 32
+MAX_CONCURRENCY = 4
+# Token bucket shared by every session served by this process
+REQUESTS_PER_SECOND = 5.0
+BURST = 10
+# Retries for a failed request, with full-jitter exponential backoff
+MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30.0
+
+_bucket = {"tokens": float(BURST), "updated": time.monotonic()}
+_bucket_lock = threading.Lock()
+
+
+# Helper Functions
+def acquire_request_token():
+    """Block until the shared token bucket allows one more embedding request."""
+    while True:
+        with _bucket_lock:
+            now = time.monotonic()
+            _bucket["tokens"] = min(BURST, _bucket["tokens"] + (now - _bucket["updated"]) * REQUESTS_PER_SECOND)
+            _bucket["updated"] = now
+            if _bucket["tokens"] >= 1:
+                _bucket["tokens"] -= 1
+                return
+            wait = (1 - _bucket["tokens"]) / REQUESTS_PER_SECOND
+        time.sleep(wait)
+
+
+def backoff_delay(attempt):
+    """Return a randomized delay before retry number `attempt` (starting at 0)."""
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+def embed_batch(texts, embeddings):
+    """Embed one batch under the shared rate limit, retrying failures with backoff."""
+    for attempt in range(MAX_RETRIES + 1):
+        acquire_request_token()
+        try:
+            return embeddings.embed_documents(texts)
+        except Exception:
+            if attempt == MAX_RETRIES:
+                raise
+            time.sleep(backoff_delay(attempt))
+
+
+def embed_texts(texts, embeddings, batch_size=BATCH_SIZE, max_concurrency=MAX_CONCURRENCY):
+    """Embed texts in batches, with at most max_concurrency requests in flight."""
+    batches = [texts[start:start + batch_size] for start in range(0, len(texts), batch_size)]
+    if len(batches) <= 1 or max_concurrency <= 1:
+        return [vector for batch in batches for vector in embed_batch(batch, embeddings)]
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        results = executor.map(embed_batch, batches, [embeddings] * len(batches))
+        return [vector for vectors in results for vector in vectors]
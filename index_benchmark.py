@@ -0,0 +1,109 @@
+"""Compare compressed FAISS index types against the flat index on our corpora.
+
+Reads the vectors of indexes saved in the index cache (or of any FAISS
+index directories given) and reports recall@k, query latency and memory of
+each index type and probe count, relative to exact flat search:
+
+    python index_benchmark.py faiss_index_cache/* --k 5 --nprobe 1 4 8 16
+
+A held-out sample of the stored vectors is used as queries. Without saved
+indexes, --synthetic N benchmarks N clustered random vectors instead.
+"""
+import argparse
+import os
+import time
+
+import faiss
+import numpy as np
+
+import compressed_index
+from index_cache import INDEX_CACHE_DIR
+
+
+# Helper Functions
+def load_vectors(paths):
+    """Return the stored vectors of the saved FAISS indexes, stacked."""
+    vectors = []
+    for path in paths:
+        index = faiss.read_index(os.path.join(path, "index.faiss"))
+        vectors.append(index.reconstruct_n(0, index.ntotal))
+    return np.vstack(vectors).astype(np.float32)
+
+
+def synthetic_vectors(num_vectors, dimensions, clusters=64, seed=0):
+    """Return clustered random unit vectors, roughly shaped like text embeddings."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dimensions))
+    vectors = centers[rng.integers(clusters, size=num_vectors)] + 0.5 * rng.standard_normal((num_vectors, dimensions))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def index_bytes(index):
+    """Return the serialized size of an index, a proxy for its memory use."""
+    return faiss.serialize_index(index).nbytes
+
+
+def recall_at_k(found, expected):
+    """Return the mean share of the exact top-k neighbours found by an approximate search."""
+    return np.mean([len(set(f) & set(e)) / len(e) for f, e in zip(found, expected)])
+
+
+def benchmark(vectors, queries, k, nprobes, index_types=compressed_index.INDEX_TYPES):
+    """Build each index type over vectors and yield one result row per probe count."""
+    flat = faiss.IndexFlatL2(vectors.shape[1])
+    flat.add(vectors)
+    _, exact = flat.search(queries, k)
+    for index_type in index_types:
+        start = time.perf_counter()
+        index = compressed_index.build_faiss_index(vectors, index_type)
+        build_seconds = time.perf_counter() - start
+        is_ivf = isinstance(index, faiss.IndexIVF)
+        if index_type != "flat" and not is_ivf:
+            print(f"{index_type}: needs {compressed_index.MIN_VECTORS[index_type]} vectors, skipped")
+            continue
+        for nprobe in (nprobes if is_ivf else [None]):
+            if is_ivf:
+                index.nprobe = nprobe
+            # One query at a time, as the app searches
+            start = time.perf_counter()
+            for query in queries:
+                index.search(query[None, :], k)
+            latency_ms = (time.perf_counter() - start) * 1000 / len(queries)
+            _, found = index.search(queries, k)
+            yield {
+                "index": index_type,
+                "nprobe": nprobe or "-",
+                f"recall@{k}": recall_at_k(found, exact),
+                "latency_ms": latency_ms,
+                "memory_mb": index_bytes(index) / 1024 ** 2,
+                "build_s": build_seconds,
+            }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", help=f"saved FAISS index directories (default: all of {INDEX_CACHE_DIR}/)")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, compressed_index.IVF_NPROBE, 16, 32])
+    parser.add_argument("--synthetic", type=int, default=0, help="benchmark N random vectors instead")
+    parser.add_argument("--dimensions", type=int, default=768, help="dimensions of the synthetic vectors")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        vectors = synthetic_vectors(args.synthetic + args.queries, args.dimensions)
+    else:
+        paths = args.paths or [
+            entry.path for entry in os.scandir(INDEX_CACHE_DIR) if entry.is_dir() and not entry.name.startswith(".")
+        ]
+        vectors = load_vectors(paths)
+    # Hold out the queries so no query is its own nearest neighbour
+    rng = np.random.default_rng(0)
+    order = rng.permutation(len(vectors))
+    queries, vectors = vectors[order[:args.queries]], vectors[order[args.queries:]]
+    print(f"{len(vectors)} vectors of {vectors.shape[1]} dimensions, {len(queries)} queries")
+
+    columns = ["index", "nprobe", f"recall@{args.k}", "latency_ms", "memory_mb", "build_s"]
+    print("".join(f"{column:>12}" for column in columns))
+    for row in benchmark(vectors, queries, args.k, args.nprobe):
+        print("".join(f"{row[c]:>12.3f}" if isinstance(row[c], float) else f"{row[c]:>12}" for c in columns))
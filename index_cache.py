@@ -0,0 +1,90 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+from langchain.vectorstores import FAISS
+
+# Directory holding one saved FAISS index per cache key
+INDEX_CACHE_DIR = "faiss_index_cache"
+# Total size allowed on disk before least recently used indexes are evicted
+INDEX_CACHE_MAX_BYTES = 2 * 1024 ** 3
+
+_lock = threading.Lock()
+
+
+# Helper Functions
+def embedding_model_name(embeddings):
+    """Return the model name of an embeddings client, for use in cache keys.
+
+    A custom endpoint (e.g. stub_embedding_server.py) is part of the identity,
+    so its vectors never share cache entries with the real provider's.
+    """
+    model_name = getattr(embeddings, "model", None) or type(embeddings).__name__
+    base_url = getattr(embeddings, "openai_api_base", None)
+    return f"{model_name}@{base_url}" if base_url else model_name
+
+
+def index_cache_key(pdf_hash, embeddings, chunk_size, chunk_overlap):
+    """Combine everything that changes an index's contents into one cache key.
+
+    Indexes are chunked page by page (see page_index), so chunk_size and
+    chunk_overlap apply within a page and no chunk spans two pages.
+    """
+    key = f"{pdf_hash}|{embedding_model_name(embeddings)}|per-page|{chunk_size}|{chunk_overlap}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def _directory_size(path):
+    """Return the total size in bytes of the files in a directory."""
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+def load_cached_index(key, embeddings, cache_dir=INDEX_CACHE_DIR):
+    """Load a saved index and mark it as recently used, or return None on a miss."""
+    path = os.path.join(cache_dir, key)
+    if not os.path.isdir(path):
+        return None
+    vector_store = FAISS.load_local(path, embeddings, allow_dangerous_deserialization=True)
+    os.utime(path)
+    return vector_store
+
+
+def save_cached_index(key, vector_store, cache_dir=INDEX_CACHE_DIR, max_bytes=INDEX_CACHE_MAX_BYTES):
+    """Save an index under its key, then evict old entries beyond the size cap."""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, key)
+    temp_path = tempfile.mkdtemp(dir=cache_dir, prefix=".tmp-")
+    vector_store.save_local(temp_path)
+    with _lock:
+        if os.path.isdir(path):
+            shutil.rmtree(temp_path)  # Another session saved the same index first
+        else:
+            os.replace(temp_path, path)
+        evict_indexes(cache_dir, max_bytes)
+
+
+def evict_indexes(cache_dir=INDEX_CACHE_DIR, max_bytes=INDEX_CACHE_MAX_BYTES):
+    """Delete least recently used indexes until the cache fits in max_bytes."""
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.is_dir() and not entry.name.startswith("."):
+            entries.append((entry.stat().st_mtime, _directory_size(entry.path), entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+
+
+def get_or_build_index(pdf_hash, embeddings, chunk_size, chunk_overlap, build_index):
+    """Return the cached index for a PDF, or build it with build_index() and cache it."""
+    key = index_cache_key(pdf_hash, embeddings, chunk_size, chunk_overlap)
+    vector_store = load_cached_index(key, embeddings)
+    if vector_store is None:
+        vector_store = build_index()
+        if vector_store is not None:
+            save_cached_index(key, vector_store)
+    return vector_store
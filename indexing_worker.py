@@ -0,0 +1,126 @@
+import threading
+
+import course_library
+
+
+class IndexingCancelled(Exception):
+    """Raised inside the worker thread once its job has been superseded."""
+
+
+# Helper Functions
+def new_job(pdfs):
+    """Return the state of an indexing job, shared by the worker thread and the app."""
+    return {
+        "lock": threading.Lock(),  # Held while a vector store of the job is modified or searched
+        "status": "running",  # running, done, failed or cancelled
+        "error": None,
+        "result": None,  # The updated course library once done
+        "cancelled": False,
+        "documents_total": len(pdfs),
+        "documents_done": 0,
+        "document": None,  # Name of the document being indexed
+        "pages_read": 0,
+        "pages_total": 0,
+        "batches_done": 0,
+        "chunks_done": 0,
+        "ready": {},  # {pdf hash: vector store} of finished documents
+        "in_progress": None,  # Vector store of the document being indexed
+    }
+
+
+def start_indexing(library, pdfs, get_document_index, index_type="flat"):
+    """Update a course library with the uploaded PDFs on a background thread.
+
+    get_document_index(pdf, pdf_hash, previous_vector_store, on_batch, lock)
+    builds one document's index, calling on_batch after every embedded batch
+    and holding lock while it modifies a vector store. The returned job dict
+    reports progress and can be kept in st.session_state across reruns.
+    index_type is passed to course_library.update_library.
+    """
+    job = new_job(pdfs)
+    thread = threading.Thread(
+        target=_run, args=(job, library, pdfs, get_document_index, index_type), daemon=True
+    )
+    thread.start()
+    return job
+
+
+def _run(job, library, pdfs, get_document_index, index_type):
+    """Index every document of a job, recording progress as it goes."""
+    def on_batch(vector_store, pages_read, pages_total, chunks_added):
+        if job["cancelled"]:
+            raise IndexingCancelled()
+        job.update(in_progress=vector_store, pages_read=pages_read, pages_total=pages_total)
+        job["batches_done"] += 1
+        job["chunks_done"] += chunks_added
+
+    def index_document(pdf, pdf_hash, previous_vector_store):
+        if job["cancelled"]:
+            raise IndexingCancelled()
+        job.update(document=pdf.name, pages_read=0, pages_total=0, in_progress=previous_vector_store)
+        return get_document_index(pdf, pdf_hash, previous_vector_store, on_batch, job["lock"])
+
+    def on_document(pdf_hash, document):
+        with job["lock"]:
+            if document["vector_store"] is not None:
+                job["ready"][pdf_hash] = document["vector_store"]
+            job["in_progress"] = None
+        job["documents_done"] += 1
+
+    try:
+        job["result"] = course_library.update_library(library, pdfs, index_document, on_document, index_type)
+        job["status"] = "done"
+    except IndexingCancelled:
+        job["status"] = "cancelled"
+    except Exception as e:
+        job["error"] = e
+        job["status"] = "failed"
+
+
+def cancel_indexing(job):
+    """Ask a job's worker to stop after its current batch."""
+    job["cancelled"] = True
+
+
+def indexing_progress(job):
+    """Return the fraction of a job done and a line describing it."""
+    if not job["documents_total"]:
+        return 1.0, "Nothing to index"
+    document_fraction = job["pages_read"] / job["pages_total"] if job["pages_total"] else 0.0
+    fraction = min(1.0, (job["documents_done"] + document_fraction) / job["documents_total"])
+    text = (
+        f"Indexing {job['document'] or '...'} "
+        f"({min(job['documents_done'] + 1, job['documents_total'])}/{job['documents_total']}): "
+        f"page {job['pages_read']}/{job['pages_total']}, "
+        f"{job['batches_done']} batches, {job['chunks_done']} chunks"
+    )
+    return fraction, text
+
+
+def similarity_search(job, query, k=4):
+    """Search every chunk a job has indexed so far, best matches first."""
+    with job["lock"]:
+        vector_stores = list(job["ready"].values())
+        if job["in_progress"] is not None and job["in_progress"] not in vector_stores:
+            vector_stores.append(job["in_progress"])
+    if not vector_stores:
+        return []
+    # Embed the question once, outside the lock, then search each store by vector
+    query_vector = vector_stores[0].embeddings.embed_query(query)
+    with job["lock"]:
+        results = [
+            result
+            for vector_store in vector_stores
+            for result in vector_store.similarity_search_with_score_by_vector(query_vector, k=k)
+        ]
+    return [doc for doc, _ in sorted(results, key=lambda result: result[1])[:k]]
+
+
+class PartialIndex:
+    """Vector-store stand-in that answers from whatever a running job has indexed."""
+
+    def __init__(self, job):
+        self.job = job
+
+    def similarity_search(self, query, k=4):
+        return similarity_search(self.job, query, k)
@@ -0,0 +1,54 @@
+import heapq
+import math
+import re
+
+# BM25 ranking parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+# Helper Functions
+def tokenize(text):
+    """Split text into lowercase word tokens."""
+    return re.findall(r"\w+", text.lower())
+
+
+def new_keyword_index():
+    """Return an empty inverted index."""
+    return {"docs": [], "postings": {}, "total_length": 0}
+
+
+def add_document(index, topic, filename, text):
+    """Index one lesson file once, recording each term's positions."""
+    doc_id = len(index["docs"])
+    tokens = tokenize(text)
+    for position, term in enumerate(tokens):
+        index["postings"].setdefault(term, {}).setdefault(doc_id, []).append(position)
+    index["docs"].append({
+        "topic": topic,
+        "filename": filename,
+        "text": text,
+        "length": len(tokens),
+    })
+    index["total_length"] += len(tokens)
+    return doc_id
+
+
+def search(index, question, k=5):
+    """Return the top-k (document, score) pairs for a question using BM25."""
+    num_docs = len(index["docs"])
+    if num_docs == 0:
+        return []
+    avg_length = index["total_length"] / num_docs or 1
+    scores = {}
+    for term in set(tokenize(question)):
+        postings = index["postings"].get(term)
+        if not postings:
+            continue
+        idf = math.log(1 + (num_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+        for doc_id, positions in postings.items():
+            tf = len(positions)
+            length_norm = 1 - BM25_B + BM25_B * index["docs"][doc_id]["length"] / avg_length
+            scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * length_norm)
+    best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+    return [(index["docs"][doc_id], score) for doc_id, score in best]
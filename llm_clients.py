@@ -0,0 +1,60 @@
+import threading
+
+import httpx
+
+# Keep-alive connections per HTTP pool, shared by every session of this process
+HTTP_POOL_SIZE = 20
+# Seconds before a request to the model provider is abandoned
+HTTP_TIMEOUT_SECONDS = 60.0
+# Seconds an idle pooled connection is kept open
+HTTP_KEEPALIVE_SECONDS = 300.0
+
+_clients = {}
+_lock = threading.RLock()  # Reentrant: creating a client fetches the shared HTTP client
+
+
+# Helper Functions
+def _shared(key, create):
+    """Return the registry entry for key, creating it once across threads."""
+    with _lock:
+        if key not in _clients:
+            _clients[key] = create()
+        return _clients[key]
+
+
+def get_http_client(pool_size=HTTP_POOL_SIZE, timeout=HTTP_TIMEOUT_SECONDS):
+    """Return the shared keep-alive HTTP client for a pool size and timeout."""
+    return _shared(("http", pool_size, timeout), lambda: httpx.Client(
+        limits=httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size,
+            keepalive_expiry=HTTP_KEEPALIVE_SECONDS,
+        ),
+        timeout=timeout,
+    ))
+
+
+def _fields(client_class):
+    """Return the constructor fields of a pydantic-based LangChain client class."""
+    return getattr(client_class, "model_fields", None) or getattr(client_class, "__fields__", {})
+
+
+def get_client(client_class, pool_size=HTTP_POOL_SIZE, timeout=HTTP_TIMEOUT_SECONDS, **settings):
+    """Return the shared client_class(**settings), creating it on first use.
+
+    Clients are kept per class and configuration for the life of the process.
+    OpenAI-compatible clients send their requests through a pooled keep-alive
+    HTTP client, so only the first request pays for connection setup.
+    """
+    key = (client_class, pool_size, timeout, tuple(sorted(settings.items())))
+
+    def create():
+        fields = _fields(client_class)
+        options = dict(settings)
+        if "http_client" in fields:
+            options["http_client"] = get_http_client(pool_size, timeout)
+        if "request_timeout" in fields:
+            options["request_timeout"] = timeout
+        return client_class(**options)
+
+    return _shared(key, create)
@@ -0,0 +1,96 @@
+import contextlib
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain.vectorstores import FAISS
+
+import embedding_cache
+import pdf_pipeline
+
+
+# Helper Functions
+def indexed_pages(vector_store):
+    """Return {page fingerprint: [docstore ids]} for a vector store built by this module."""
+    pages = {}
+    for doc_id in vector_store.index_to_docstore_id.values():
+        doc = vector_store.docstore.search(doc_id)
+        fingerprint = getattr(doc, "metadata", {}).get("fingerprint")
+        if fingerprint is None:
+            return None  # Not built page by page, so it cannot be updated in place
+        pages.setdefault(fingerprint, []).append(doc_id)
+    return pages
+
+
+def iter_page_chunks(pdf, page_numbers, fingerprints, chunk_size, chunk_overlap):
+    """Yield (pages read so far, chunk, metadata) for the chunks of the given pages.
+
+    Each page is split on its own, so a chunk never spans two pages and pages
+    shorter than chunk_size become a single chunk. This is what lets a changed
+    page be re-indexed without touching its neighbours.
+    """
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    pages = pdf_pipeline.iter_pages(pdf, page_numbers=page_numbers)
+    for pages_read, (page_number, text) in enumerate(zip(page_numbers, pages), start=1):
+        for chunk in text_splitter.split_text(pdf_pipeline.normalize_text(text)):
+            yield pages_read, chunk, {"page": page_number, "fingerprint": fingerprints[page_number]}
+
+
+def add_pages(vector_store, pdf, page_numbers, fingerprints, embeddings, chunk_size, chunk_overlap,
+              on_batch=None, lock=None):
+    """Extract, chunk and embed the given pages batch by batch, adding them to the store (or creating one).
+
+    on_batch(vector_store, pages_read, pages_total, chunks_added) is called
+    after each batch is searchable. The store is only modified while holding
+    lock, if given, so other threads can search it in the meantime.
+    """
+    lock = lock or contextlib.nullcontext()
+    for batch in pdf_pipeline.iter_batches(iter_page_chunks(pdf, page_numbers, fingerprints, chunk_size, chunk_overlap)):
+        pages_read = batch[-1][0]
+        texts = [chunk for _, chunk, _ in batch]
+        metadatas = [metadata for _, _, metadata in batch]
+        text_embeddings = list(zip(texts, embedding_cache.embed_documents(texts, embeddings)))
+        with lock:
+            if vector_store is None:
+                vector_store = FAISS.from_embeddings(text_embeddings, embedding=embeddings, metadatas=metadatas)
+            else:
+                vector_store.add_embeddings(text_embeddings, metadatas=metadatas)
+        if on_batch is not None:
+            on_batch(vector_store, pages_read, len(page_numbers), len(texts))
+    return vector_store
+
+
+def update_vector_store(vector_store, pdf, embeddings, chunk_size, chunk_overlap, on_batch=None, lock=None):
+    """Bring a page-level vector store up to date with a new upload of the same document.
+
+    Pages whose fingerprint is unchanged keep their vectors. Pages that are new
+    or changed are re-extracted and re-embedded, and vectors of pages that no
+    longer exist are removed. Without a previous page-level store, every page
+    is indexed. on_batch and lock are passed to add_pages.
+    """
+    fingerprints = pdf_pipeline.page_fingerprints(pdf)
+    pages = indexed_pages(vector_store) if vector_store is not None else None
+    if pages is None:
+        return add_pages(
+            None, pdf, range(len(fingerprints)), fingerprints, embeddings, chunk_size, chunk_overlap, on_batch, lock
+        )
+
+    current = set(fingerprints)
+    stale_ids = [doc_id for fingerprint, ids in pages.items() if fingerprint not in current for doc_id in ids]
+    # Unchanged pages may have moved, so refresh their page numbers
+    first_page = {}
+    for page_number, fingerprint in enumerate(fingerprints):
+        first_page.setdefault(fingerprint, page_number)
+    with lock or contextlib.nullcontext():
+        if stale_ids:
+            vector_store.delete(stale_ids)
+        for fingerprint, ids in pages.items():
+            if fingerprint in current:
+                for doc_id in ids:
+                    vector_store.docstore.search(doc_id).metadata["page"] = first_page[fingerprint]
+
+    changed = [page_number for page_number, fingerprint in enumerate(fingerprints) if fingerprint not in pages]
+    vector_store = add_pages(
+        vector_store, pdf, changed, fingerprints, embeddings, chunk_size, chunk_overlap, on_batch, lock
+    )
+    if vector_store.index.ntotal == 0:
+        return None
+    return vector_store
@@ -0,0 +1,143 @@
+import hashlib
+import io
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from PyPDF2 import PdfReader
+
+# Worker processes used to extract text from large PDFs
+PDF_WORKERS = os.cpu_count() or 1
+# PDFs with fewer pages than this are extracted serially
+PARALLEL_MIN_PAGES = 32
+# Pages handed to a worker at a time, so results stream back in order
+PAGES_PER_TASK = 8
+# Bytes hashed per read when fingerprinting an upload
+HASH_BLOCK_SIZE = 1024 * 1024
+# Upload hashes remembered per (uploaded-file id, size)
+UPLOAD_HASH_MEMO_SIZE = 1024
+
+# Chunks handed to the embedding scheduler at a time, which splits them into
+# concurrent requests
+EMBEDDING_BATCH_SIZE = 128
+
+
+# Helper Functions
+def read_pdf_bytes(pdf):
+    """Return the full contents of an uploaded PDF without moving its stream position."""
+    if hasattr(pdf, "getvalue"):
+        return pdf.getvalue()
+    position = pdf.tell()
+    content = pdf.read()
+    pdf.seek(position)
+    return content
+
+
+_upload_hashes = {}
+
+
+def hash_pdf(pdf):
+    """Return a BLAKE2 hash of one upload, streamed in blocks and memoized per file id and size.
+
+    Streamlit reruns the script on every interaction, so a rerun with the same
+    upload returns the remembered hash without reading the file.
+    """
+    file_id = getattr(pdf, "file_id", None) or getattr(pdf, "id", None)
+    memo_key = (file_id, getattr(pdf, "size", None)) if file_id is not None else None
+    if memo_key in _upload_hashes:
+        return _upload_hashes[memo_key]
+    digest = hashlib.blake2b(digest_size=32)
+    if hasattr(pdf, "getbuffer"):
+        buffer = pdf.getbuffer()
+        for start in range(0, len(buffer), HASH_BLOCK_SIZE):
+            digest.update(buffer[start:start + HASH_BLOCK_SIZE])
+        buffer.release()
+    else:
+        position = pdf.tell()
+        pdf.seek(0)
+        for block in iter(lambda: pdf.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+        pdf.seek(position)
+    pdf_hash = digest.hexdigest()
+    if memo_key is not None:
+        if len(_upload_hashes) >= UPLOAD_HASH_MEMO_SIZE:
+            _upload_hashes.clear()
+        _upload_hashes[memo_key] = pdf_hash
+    return pdf_hash
+
+
+def hash_pdfs(pdf_docs):
+    """Return one hash for one or more uploads."""
+    if not isinstance(pdf_docs, list):
+        return hash_pdf(pdf_docs)
+    digest = hashlib.blake2b(digest_size=32)
+    for pdf in pdf_docs:
+        digest.update(hash_pdf(pdf).encode("ascii"))
+    return digest.hexdigest()
+
+
+# PDF reader opened once per worker process by _init_worker
+_worker_reader = None
+
+
+def _init_worker(pdf_bytes):
+    """Open this worker's own reader on the shared PDF bytes."""
+    global _worker_reader
+    _worker_reader = PdfReader(io.BytesIO(pdf_bytes))
+
+
+def _extract_page_texts(page_numbers):
+    """Extract the text of the given pages with this worker's reader."""
+    return [_worker_reader.pages[page_number].extract_text() or "" for page_number in page_numbers]
+
+
+def iter_pages(pdf, workers=PDF_WORKERS, page_numbers=None):
+    """Yield the text of the pages of one PDF, in order, as pages are extracted.
+
+    All pages are extracted unless page_numbers is given. Large extractions are
+    split into small groups of pages spread over worker processes, each of
+    which opens its own reader on the same bytes.
+    """
+    pdf_bytes = read_pdf_bytes(pdf)
+    pdf_reader = PdfReader(io.BytesIO(pdf_bytes))
+    if page_numbers is None:
+        page_numbers = range(len(pdf_reader.pages))
+    page_numbers = list(page_numbers)
+    if workers <= 1 or len(page_numbers) < PARALLEL_MIN_PAGES:
+        for page_number in page_numbers:
+            yield pdf_reader.pages[page_number].extract_text() or ""
+        return
+    tasks = [page_numbers[start:start + PAGES_PER_TASK] for start in range(0, len(page_numbers), PAGES_PER_TASK)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(pdf_bytes,)) as executor:
+        for texts in executor.map(_extract_page_texts, tasks):
+            yield from texts
+
+
+def page_fingerprints(pdf):
+    """Return a fingerprint per page, hashed from its raw content stream without extracting text."""
+    pdf_reader = PdfReader(io.BytesIO(read_pdf_bytes(pdf)))
+    fingerprints = []
+    for page in pdf_reader.pages:
+        contents = page.get_contents()
+        digest = hashlib.blake2b(contents.get_data() if contents is not None else b"", digest_size=16)
+        digest.update(repr(page.mediabox).encode("utf-8"))
+        fingerprints.append(digest.hexdigest())
+    return fingerprints
+
+
+def normalize_text(text):
+    """Collapse runs of spaces and blank lines left over from PDF extraction."""
+    text = re.sub(r"[ \t\r\f\v]+", " ", text.replace("\x00", ""))
+    return re.sub(r"\n\s*\n+", "\n\n", text).strip()
+
+
+def iter_batches(items, batch_size=EMBEDDING_BATCH_SIZE):
+    """Group a stream of items into lists of at most batch_size."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,147 @@
+import json
+import os
+import random
+import tempfile
+import threading
+
+# Directory holding one JSON question pool per PDF hash
+QUIZ_BANK_DIR = "quiz_bank"
+# Questions per quiz, pool size to fill up to, and size below which the pool is topped up
+QUESTIONS_PER_QUIZ = 5
+POOL_TARGET = 30
+REFILL_BELOW = 10
+# Pages per section, questions asked per section, and section text sent to the model
+PAGES_PER_SECTION = 5
+QUESTIONS_PER_SECTION = 3
+SECTION_MAX_CHARS = 8000
+
+QUESTION_PROMPT = """
+    Write {count} multiple choice questions about the course section below.
+    Make each question clear and specific, with 4 plausible but distinct options.
+    Answer with a JSON list only, where each item looks like:
+    {{"question": "...", "options": {{"A": "...", "B": "...", "C": "...", "D": "..."}}, "answer": "A"}}
+
+    Section:
+    {section}
+    """
+
+_lock = threading.Lock()
+# PDF hashes whose pool is being filled by a background thread
+_filling = set()
+
+
+# Helper Functions
+def library_sections(library, pages_per_section=PAGES_PER_SECTION):
+    """Split the indexed chunks of a course library into sections of a few pages each."""
+    sections = []
+    for document in library["documents"].values():
+        vector_store = document["vector_store"]
+        if vector_store is None:
+            continue
+        by_section = {}
+        for doc_id in vector_store.index_to_docstore_id.values():
+            doc = vector_store.docstore.search(doc_id)
+            section = doc.metadata.get("page", 0) // pages_per_section
+            by_section.setdefault(section, []).append(doc.page_content)
+        for section in sorted(by_section):
+            sections.append("\n".join(by_section[section])[:SECTION_MAX_CHARS])
+    return sections
+
+
+def parse_questions(text):
+    """Return the well-formed questions of a model reply, ignoring anything else."""
+    try:
+        items = json.loads(text[text.index("["):text.rindex("]") + 1])
+    except ValueError:
+        return []
+    questions = []
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict) or not isinstance(item.get("options"), dict):
+            continue
+        options = {label: str(item["options"].get(label, "")).strip() for label in "ABCD"}
+        if item.get("question") and all(options.values()) and item.get("answer") in options:
+            questions.append({"question": str(item["question"]).strip(), "options": options, "answer": item["answer"]})
+    return questions
+
+
+def _bank_path(pdf_hash, bank_dir):
+    return os.path.join(bank_dir, f"{pdf_hash}.json")
+
+
+def load_bank(pdf_hash, bank_dir=QUIZ_BANK_DIR):
+    """Return the saved bank of a PDF: its question pool and the next section to ask about."""
+    try:
+        with open(_bank_path(pdf_hash, bank_dir), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"questions": [], "next_section": 0}
+
+
+def save_bank(pdf_hash, bank, bank_dir=QUIZ_BANK_DIR):
+    """Write a bank atomically, so readers never see a half-written file."""
+    os.makedirs(bank_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=bank_dir, prefix=".tmp-", suffix=".json")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(bank, f, indent=4)
+    os.replace(temp_path, _bank_path(pdf_hash, bank_dir))
+
+
+def sample_quiz(pdf_hash, count=QUESTIONS_PER_QUIZ, bank_dir=QUIZ_BANK_DIR):
+    """Take count random questions out of a PDF's pool, or return [] if it has too few."""
+    with _lock:
+        bank = load_bank(pdf_hash, bank_dir)
+        if len(bank["questions"]) < count:
+            return []
+        picked = set(random.sample(range(len(bank["questions"])), count))
+        quiz = [question for i, question in enumerate(bank["questions"]) if i in picked]
+        bank["questions"] = [question for i, question in enumerate(bank["questions"]) if i not in picked]
+        save_bank(pdf_hash, bank, bank_dir)
+    return quiz
+
+
+def fill_pool(pdf_hash, sections, generate, target=POOL_TARGET, bank_dir=QUIZ_BANK_DIR):
+    """Generate questions section by section, round robin, until the pool reaches target.
+
+    generate(prompt) returns the model's reply. A section whose reply cannot
+    be parsed is skipped; the pool is saved after every section.
+    """
+    for _ in range(len(sections)):
+        with _lock:
+            bank = load_bank(pdf_hash, bank_dir)
+        if len(bank["questions"]) >= target:
+            return
+        section_number = bank["next_section"] % len(sections)
+        reply = generate(QUESTION_PROMPT.format(count=QUESTIONS_PER_SECTION, section=sections[section_number]))
+        with _lock:
+            bank = load_bank(pdf_hash, bank_dir)
+            bank["questions"].extend(parse_questions(reply))
+            bank["next_section"] = section_number + 1
+            save_bank(pdf_hash, bank, bank_dir)
+
+
+def ensure_pool(pdf_hash, sections, generate, bank_dir=QUIZ_BANK_DIR):
+    """Top up a PDF's pool on a background thread once it runs low; return at once."""
+    if not sections:
+        return
+    with _lock:
+        if pdf_hash in _filling or len(load_bank(pdf_hash, bank_dir)["questions"]) >= REFILL_BELOW:
+            return
+        _filling.add(pdf_hash)
+
+    def run():
+        try:
+            fill_pool(pdf_hash, sections, generate, bank_dir=bank_dir)
+        finally:
+            with _lock:
+                _filling.discard(pdf_hash)
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def format_quiz(questions):
+    """Render questions in the quiz format of the chat, without the answers."""
+    blocks = []
+    for number, question in enumerate(questions, start=1):
+        options = "  \n".join(f"**{label})** {text}" for label, text in question["options"].items())
+        blocks.append(f"Question {number}: {question['question']}\n\n{options}")
+    return "\n\n".join(blocks)
@@ -0,0 +1,82 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from ttl_cache import get_entry, live_items, normalize_question, put_entry
+
+# Cache limits, shared by every session served by this process
+CACHE_SIZE = 512
+CACHE_TTL_SECONDS = 3600
+# Cosine similarity above which a different question reuses a cached response (None = exact only)
+SIMILARITY_THRESHOLD = None
+
+# (document key, normalized question) -> (expiry time, (response, unit question vector or None))
+_cache = OrderedDict()
+_lock = threading.Lock()
+stats = {"hits": 0, "similar_hits": 0, "misses": 0}
+
+
+# Helper Functions
+def _unit(vector):
+    """Return a vector scaled to unit length, for cosine similarity by dot product."""
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / (np.linalg.norm(vector) or 1.0)
+
+
+def _most_similar(document_key, question_vector, threshold):
+    """Return the live entry key for the document closest to question_vector above threshold."""
+    best_key, best_score = None, threshold
+    for key, (_, vector) in live_items(_cache):
+        if key[0] != document_key or vector is None:
+            continue
+        score = float(vector @ question_vector)
+        if score >= best_score:
+            best_key, best_score = key, score
+    return best_key
+
+
+def lookup(document_key, question, embeddings=None, threshold=SIMILARITY_THRESHOLD):
+    """Return (cached response or None, question vector) for a question about a document.
+
+    An exact match on the normalized question is tried first. With a
+    threshold and an embeddings client, the question is embedded and the
+    most similar cached question of the same document above the threshold
+    is used. Pass the returned vector to store() so later look-ups can match it.
+    """
+    key = (document_key, normalize_question(question))
+    with _lock:
+        entry = get_entry(_cache, key)
+        if entry is not None:
+            stats["hits"] += 1
+            return entry
+        if threshold is None or embeddings is None:
+            stats["misses"] += 1
+            return None, None
+    # Embed outside the lock; it is a network call
+    question_vector = _unit(embeddings.embed_query(question))
+    with _lock:
+        similar_key = _most_similar(document_key, question_vector, threshold)
+        if similar_key is None:
+            stats["misses"] += 1
+            return None, question_vector
+        stats["similar_hits"] += 1
+        return get_entry(_cache, similar_key)[0], question_vector
+
+
+def store(document_key, question, response, question_vector=None):
+    """Cache a response, evicting the least recently used entries beyond the size limit."""
+    key = (document_key, normalize_question(question))
+    with _lock:
+        put_entry(_cache, key, (response, question_vector), CACHE_TTL_SECONDS, CACHE_SIZE)
+
+
+def stats_text():
+    """Describe the cache's hit and miss counters."""
+    with _lock:
+        total = stats["hits"] + stats["similar_hits"] + stats["misses"]
+        hit_rate = (stats["hits"] + stats["similar_hits"]) / total if total else 0.0
+        return (
+            f"Response cache: {stats['hits']} exact and {stats['similar_hits']} similar hits, "
+            f"{stats['misses']} misses ({hit_rate:.0%} hit rate)"
+        )
@@ -0,0 +1,97 @@
+"""Local stand-in for an OpenAI-compatible embeddings API, for benchmarking.
+
+Run it and point OpenAIEmbeddings at it through the `embedding_base_url`
+secret, e.g. embedding_base_url = "http://localhost:8765/v1":
+
+    python stub_embedding_server.py --port 8765 --latency 0.2 --max-rps 10
+
+Vectors are deterministic per input. Requests beyond --max-rps get HTTP 429,
+like a provider's rate limit.
+"""
+import argparse
+import base64
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+settings = {"latency": 0.0, "max_rps": 0.0, "dimensions": 1536}
+_request_times = []
+_lock = threading.Lock()
+
+
+# Helper Functions
+def stub_vector(text, dimensions, encoding_format="float"):
+    """Return a deterministic unit vector for an input, as floats or base64 float32."""
+    seed = int.from_bytes(hashlib.sha256(json.dumps(text).encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dimensions)
+    vector = (vector / np.linalg.norm(vector)).astype(np.float32)
+    if encoding_format == "base64":
+        return base64.b64encode(vector.tobytes()).decode("ascii")
+    return vector.tolist()
+
+
+def rate_limited():
+    """Record a request and report whether it exceeds the requests-per-second limit."""
+    if not settings["max_rps"]:
+        return False
+    with _lock:
+        now = time.monotonic()
+        _request_times[:] = [t for t in _request_times if now - t < 1.0]
+        if len(_request_times) >= settings["max_rps"]:
+            return True
+        _request_times.append(now)
+        return False
+
+
+class StubEmbeddingHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/embeddings"):
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        if rate_limited():
+            self._send_json(429, {"error": {"message": "Rate limit exceeded", "type": "rate_limit_error"}})
+            return
+        time.sleep(settings["latency"])
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        # A flat list of token ids is a single input
+        if inputs and isinstance(inputs[0], int):
+            inputs = [inputs]
+        encoding_format = body.get("encoding_format", "float")
+        data = [
+            {"object": "embedding", "index": i, "embedding": stub_vector(text, settings["dimensions"], encoding_format)}
+            for i, text in enumerate(inputs)
+        ]
+        self._send_json(200, {
+            "object": "list",
+            "data": data,
+            "model": body.get("model", "stub"),
+            "usage": {"prompt_tokens": 0, "total_tokens": 0},
+        })
+
+    def _send_json(self, status, payload):
+        content = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--max-rps", type=float, default=0.0, help="requests per second before HTTP 429 (0 = unlimited)")
+    parser.add_argument("--dimensions", type=int, default=1536)
+    args = parser.parse_args()
+    settings.update(latency=args.latency, max_rps=args.max_rps, dimensions=args.dimensions)
+    print(f"Stub embedding server listening on http://localhost:{args.port}/v1")
+    ThreadingHTTPServer(("", args.port), StubEmbeddingHandler).serve_forever()
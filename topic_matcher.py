@@ -0,0 +1,46 @@
+from collections import deque
+
+
+# Helper Functions
+def build_matcher(patterns):
+    """Compile case-insensitive patterns into an Aho-Corasick automaton."""
+    goto = [{}]
+    fail = [0]
+    output = [[]]
+    for pattern_idx, pattern in enumerate(patterns):
+        state = 0
+        for char in pattern.lower():
+            if char not in goto[state]:
+                goto.append({})
+                fail.append(0)
+                output.append([])
+                goto[state][char] = len(goto) - 1
+            state = goto[state][char]
+        if pattern:
+            output[state].append(pattern_idx)
+
+    # Breadth-first pass to link each state to its longest proper suffix state
+    queue = deque(goto[0].values())
+    while queue:
+        state = queue.popleft()
+        for char, next_state in goto[state].items():
+            queue.append(next_state)
+            fallback = fail[state]
+            while fallback and char not in goto[fallback]:
+                fallback = fail[fallback]
+            fail[next_state] = goto[fallback].get(char, 0)
+            output[next_state] = output[next_state] + output[fail[next_state]]
+    return {"patterns": list(patterns), "goto": goto, "fail": fail, "output": output}
+
+
+def find_matches(matcher, text):
+    """Return every pattern found in the text, in one pass, in pattern order."""
+    goto, fail, output = matcher["goto"], matcher["fail"], matcher["output"]
+    found = set()
+    state = 0
+    for char in text.lower():
+        while state and char not in goto[state]:
+            state = fail[state]
+        state = goto[state].get(char, 0)
+        found.update(output[state])
+    return [matcher["patterns"][pattern_idx] for pattern_idx in sorted(found)]
@@ -0,0 +1,40 @@
+import re
+import time
+
+# Shared helpers for the in-process answer caches. Each cache is an
+# OrderedDict of key -> (expiry time, value), guarded by its owner's lock.
+
+
+# Helper Functions
+def normalize_question(question):
+    """Normalize case, punctuation and whitespace so equivalent questions share a key."""
+    question = re.sub(r"[^\w\s]", " ", question.lower())
+    return " ".join(question.split())
+
+
+def get_entry(cache, key):
+    """Return a live value and mark it recently used, or None on a miss or an expired entry."""
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    if entry[0] < time.monotonic():
+        del cache[key]
+        return None
+    cache.move_to_end(key)
+    return entry[1]
+
+
+def put_entry(cache, key, value, ttl_seconds, max_size):
+    """Store a value, evicting the least recently used entries beyond max_size."""
+    cache[key] = (time.monotonic() + ttl_seconds, value)
+    cache.move_to_end(key)
+    while len(cache) > max_size:
+        cache.popitem(last=False)
+
+
+def live_items(cache):
+    """Yield the (key, value) pairs that have not expired yet."""
+    now = time.monotonic()
+    for key, (expires, value) in cache.items():
+        if expires >= now:
+            yield key, value